@@ -105,10 +105,8 @@ async def create_api_key(
     settings=Depends(get_settings_dependency),
 ):
     auth = AuthService(db, settings)
-    # parse allowed recipients from comma-separated form field
-    allowed_list = None
-    if allowed:
-        allowed_list = [e.strip().lower() for e in allowed.split(",") if e.strip()]
+    # parse allowed recipients from comma-separated form field; create_api_key normalizes them
+    allowed_list = allowed.split(",") if allowed else None
 
     key_obj, plain_key = await auth.create_api_key(
         name=name,
@@ -49,6 +49,19 @@ class Settings(BaseSettings):
         alias="SMTP_STARTTLS",
         description="Use STARTTLS for SMTP",
     )
+    smtp_pool_size: int = Field(
+        default=5,
+        alias="SMTP_POOL_SIZE",
+        ge=1,
+        le=100,
+        description="Maximum number of pooled SMTP connections",
+    )
+    smtp_pool_max_messages: int = Field(
+        default=100,
+        alias="SMTP_POOL_MAX_MESSAGES",
+        ge=1,
+        description="Messages sent over one pooled SMTP connection before it is recycled",
+    )
     from_email: str = Field(
         default="noreply@example.com",
         alias="FROM_EMAIL",
@@ -74,7 +87,7 @@ class Settings(BaseSettings):
         default="x" * 32,
         alias="APP_SECRET_KEY",
         min_length=32,
-        description="Secret key for signing tokens",
+        description="Secret key for signing tokens and hashing API keys (changing it invalidates issued keys)",
     )
     # Admin panel protection (optional)
     admin_username: Optional[str] = Field(
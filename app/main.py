@@ -9,6 +9,7 @@ import sentry_sdk
 import structlog
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from prometheus_fastapi_instrumentator import Instrumentator
 from sentry_sdk.integrations.fastapi import FastApiIntegration
@@ -16,6 +17,7 @@ from sentry_sdk.integrations.fastapi import FastApiIntegration
 from app.api.v1 import router as v1routes
 from app.api.v1.admin import router as admin_router
 from app.core.config import get_settings
+from app.services.mailer import close_smtp_pool
 
 # Initialize Sentry SDK from settings (only if DSN provided)
 settings_for_sentry = get_settings()
@@ -140,6 +142,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Application shutting down")
+    await close_smtp_pool()
 
 
 def create_app() -> FastAPI:
@@ -174,12 +177,7 @@ def create_app() -> FastAPI:
             content_length = int(request.headers["content-length"])
             if content_length > max_size:
                 msg = f"Request entity too large. Maximum size is {max_size // 1024}KB."
-                content = f"{{'detail': '{msg}'}}"
-                return Response(
-                    status_code=413,
-                    content=content,
-                    media_type="application/json",
-                )
+                return JSONResponse(status_code=413, content={"detail": msg})
 
         return await call_next(request)
 
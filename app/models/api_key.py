@@ -1,7 +1,9 @@
+import os
+import time
 import uuid
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text
+from sqlalchemy import DDL, Boolean, DateTime, Integer, String, Text, event
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -9,10 +11,28 @@ from sqlalchemy.sql import func
 from app.db.base import Base
 
 
+def uuid7() -> uuid.UUID:
+    """Generate a time-ordered UUIDv7 (RFC 9562).
+
+    The 48-bit millisecond timestamp prefix keeps new primary keys, and the foreign keys
+    pointing at them, clustered at the right edge of their btree indexes.
+    """
+    unix_ts_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")  # 80 random bits: 12 for rand_a, 62 for rand_b
+    value = (
+        (unix_ts_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76  # version
+        | (rand >> 68) << 64  # rand_a
+        | 0b10 << 62  # variant
+        | rand & 0x3FFF_FFFF_FFFF_FFFF  # rand_b
+    )
+    return uuid.UUID(int=value)
+
+
 class APIKey(Base):
     __tablename__ = "api_keys"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     key_hash: Mapped[str] = mapped_column(Text, unique=True, nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
@@ -27,3 +47,34 @@ class APIKey(Base):
             f"<APIKey(id={self.id}, name='{self.name}', active={self.is_active}, "
             f"allowed_recipients={self.allowed_recipients})>"
         )
+
+
+# allowed_recipients normalization lives only here: lower-case and trim whitespace (spaces, tabs, CR, LF)
+# from every recipient, dropping blanks, whichever code path writes the row. Migration 7c2e9f41b0d3 installs
+# the same DDL on migrated databases; create_all() (fresh dev databases, the test schema) installs it through
+# this after_create hook.
+NORMALIZE_ALLOWED_RECIPIENTS_FUNCTION = DDL("""
+    CREATE OR REPLACE FUNCTION %(schema)s.normalize_allowed_recipients() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.allowed_recipients IS NOT NULL AND jsonb_typeof(NEW.allowed_recipients) = 'array' THEN
+            NEW.allowed_recipients := COALESCE(
+                (
+                    SELECT jsonb_agg(lower(btrim(t.recipient, E' \\t\\r\\n')) ORDER BY t.ord)
+                    FROM jsonb_array_elements_text(NEW.allowed_recipients) WITH ORDINALITY AS t(recipient, ord)
+                    WHERE btrim(t.recipient, E' \\t\\r\\n') <> ''
+                ),
+                '[]'::jsonb
+            );
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+NORMALIZE_ALLOWED_RECIPIENTS_TRIGGER = DDL("""
+    CREATE TRIGGER trg_api_keys_normalize_allowed_recipients
+    BEFORE INSERT OR UPDATE OF allowed_recipients ON %(fullname)s
+    FOR EACH ROW EXECUTE FUNCTION %(schema)s.normalize_allowed_recipients()
+    """)
+
+event.listen(APIKey.__table__, "after_create", NORMALIZE_ALLOWED_RECIPIENTS_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(APIKey.__table__, "after_create", NORMALIZE_ALLOWED_RECIPIENTS_TRIGGER.execute_if(dialect="postgresql"))
@@ -20,5 +20,8 @@ class SendLog(Base):
     recipient: Mapped[str] = mapped_column(String(255), nullable=False)
     message_id: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+    # Fetch server-generated columns (sent_at) via RETURNING on flush
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self) -> str:
         return f"<SendLog(id={self.id}, recipient='{self.recipient}', " f"sent_at='{self.sent_at}')>"
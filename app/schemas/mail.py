@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Dict, Optional
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, validator
 
 
 class MailRequest(BaseModel):
@@ -21,8 +21,8 @@ class MailRequest(BaseModel):
             raise ValueError("Either html or text body is required")
         return v
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "to": "user@example.com",
                 "subject": "Test Email",
@@ -31,19 +31,21 @@ class MailRequest(BaseModel):
                 "headers": {"X-Custom": "v"},
             }
         }
+    )
 
 
 class MailResponse(BaseModel):
     status: str = Field(..., description="Email status (queued)")
     remaining: int = Field(..., description="Remaining emails in daily limit")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "queued",
                 "remaining": 95,
             }
         }
+    )
 
 
 class SendLogResponse(BaseModel):
@@ -57,8 +59,7 @@ class SendLogResponse(BaseModel):
     sent_at: Optional[datetime] = None
     error_message: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class HealthResponse(BaseModel):
@@ -66,14 +67,15 @@ class HealthResponse(BaseModel):
     timestamp: datetime = Field(..., description="Current timestamp")
     version: str = Field(..., description="Application version")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "timestamp": "2024-01-01T00:00:00Z",
                 "version": "0.1.0",
             }
         }
+    )
 
 
 class CreateAPIKeyRequest(BaseModel):
@@ -87,8 +89,8 @@ class CreateAPIKeyResponse(BaseModel):
     name: str
     daily_limit: Optional[int]
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "id": "550e8400-e29b-41d4-a716-446655440000",
                 "plain_key": "sk_test_abcdefghijklmnop",
@@ -96,3 +98,4 @@ class CreateAPIKeyResponse(BaseModel):
                 "daily_limit": 100,
             }
         }
+    )
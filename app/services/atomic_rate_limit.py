@@ -1,10 +1,12 @@
+import time
 import uuid
 from datetime import date, datetime, timedelta, timezone
-from typing import NamedTuple, Optional
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
 
 import structlog
-from sqlalchemy import func, select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import ColumnElement, and_, case, column, func, literal, literal_column, select, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import Settings
@@ -14,6 +16,8 @@ from app.models.send_log import SendLog
 
 logger = structlog.get_logger(__name__)
 
+SECONDS_PER_DAY = 24 * 60 * 60
+
 
 class RateLimitResult(NamedTuple):
     """Result of a rate limit check."""
@@ -23,6 +27,16 @@ class RateLimitResult(NamedTuple):
     retry_after_seconds: Optional[int] = None
 
 
+@lru_cache(maxsize=1)
+def _retry_after_for_minute(epoch_minute: int) -> int:
+    """Seconds from the start of the given Unix minute to the next midnight UTC.
+
+    Cached, so rejected requests within the same minute share one computation. Measuring
+    from the start of the minute can only overstate the wait, never understate it.
+    """
+    return SECONDS_PER_DAY - (epoch_minute * 60) % SECONDS_PER_DAY
+
+
 class AtomicRateLimitService:
     def __init__(self, db: AsyncSession, settings: Settings):
         self.db = db
@@ -32,127 +46,92 @@ class AtomicRateLimitService:
         """
         Atomically check and increment daily usage count.
 
+        No explicit locking (SELECT ... FOR UPDATE, advisory locks, SERIALIZABLE) is needed:
+        ON CONFLICT DO UPDATE takes the row lock on today's usage row and re-evaluates the
+        limit guard against the latest committed count, so concurrent requests for the same
+        key serialize on that single row and cannot overshoot the limit.
+
         Returns:
             RateLimitResult: Result with allowed status, current count, and retry info
         """
         today = date.today()  # UTC date
 
+        if email_count == 0:
+            # Read-only usage probe (e.g. the usage endpoint): nothing to lock or write
+            current_count = await self._get_current_usage(api_key_id, today)
+            return RateLimitResult(allowed=True, current_count=current_count, retry_after_seconds=None)
+
         try:
-            # Get effective daily limit for this API key
-            effective_limit = await self._get_effective_daily_limit(api_key_id)
+            # Resolve the limit inside the statement instead of a separate SELECT on api_keys.
+            # It lives in its own CTE so it is evaluated once and both guards below can use it.
+            # An unknown key yields no row, so the limit is NULL, both guards fail and nothing is
+            # inserted: the foreign key is never violated.
+            limits = (
+                select(self._effective_daily_limit_clause().label("daily_limit"))
+                .where(APIKey.id == api_key_id)
+                .cte("limits")
+            )
+            daily_limit = select(limits.c.daily_limit).scalar_subquery()
+
+            # INSERT ... SELECT ... ON CONFLICT DO UPDATE ... RETURNING creates today's row or
+            # increments it. Both the insert and the update are guarded by the limit, so when the
+            # request would exceed it the CTE returns no row and nothing is written. The outer
+            # SELECT always returns one row carrying the new count (NULL when rejected), the
+            # unchanged count and the limit, so accept and reject cost one round trip.
+            upsert = insert(DailyUsage).from_select(
+                ["api_key_id", "day", "count"],
+                select(
+                    literal(api_key_id, DailyUsage.api_key_id.type),
+                    literal(today, DailyUsage.day.type),
+                    literal(email_count, DailyUsage.count.type),
+                ).where(literal(email_count, DailyUsage.count.type) <= daily_limit),
+            )
+            upsert_stmt = upsert.on_conflict_do_update(
+                constraint="uq_daily_usage_api_key_day",
+                set_=dict(count=DailyUsage.count + upsert.excluded.count),
+                where=(DailyUsage.count + upsert.excluded.count) <= daily_limit,
+            ).returning(DailyUsage.count)
+            upserted = upsert_stmt.cte("upserted")
+
+            stmt = select(
+                select(upserted.c.count).scalar_subquery(),
+                select(DailyUsage.count)
+                .where(DailyUsage.api_key_id == api_key_id, DailyUsage.day == today)
+                .scalar_subquery(),
+                daily_limit,
+            )
+            res = await self.db.execute(stmt)
+            new_count, old_count, effective_limit = res.one()
 
-            # Use a transactional SELECT ... FOR UPDATE to atomically read/update the
-            # DailyUsage row. If the row does not exist we create it. Handle a possible
-            # race where two transactions try to create the row simultaneously by
-            # catching IntegrityError and retrying once.
-            class _RateLimitExceeded(Exception):
-                def __init__(self, old_count: int):
-                    self.old_count = old_count
-
-            try:
-                stmt = (
-                    select(DailyUsage)
-                    .where(DailyUsage.api_key_id == api_key_id, DailyUsage.day == today)
-                    .with_for_update()
-                )
-                res = await self.db.execute(stmt)
-                usage = res.scalar_one_or_none()
-
-                if usage is None:
-                    # create a new row
-                    usage = DailyUsage(api_key_id=api_key_id, day=today, count=email_count)
-                    self.db.add(usage)
-                    # flush to assign DB defaults / persist
-                    await self.db.flush()
-                    old_count = 0
-                    new_count = usage.count
-                else:
-                    old_count = usage.count
-                    usage.count = usage.count + email_count
-                    new_count = usage.count
-
-                # If the new count exceeds the limit, raise to rollback the transaction
-                if new_count > effective_limit:
-                    # raising will rollback the current transaction
-                    raise _RateLimitExceeded(old_count)
-
-                # if we reach here the transaction committed successfully
-                logger.info(
-                    "Rate limit check passed",
-                    api_key_id=str(api_key_id),
-                    day=today.isoformat(),
-                    new_count=new_count,
-                    effective_limit=effective_limit,
-                    email_count=email_count,
-                )
-                return RateLimitResult(allowed=True, current_count=new_count, retry_after_seconds=None)
+            if effective_limit is None:
+                logger.warning("Rate limit check for unknown API key", api_key_id=str(api_key_id))
+                return RateLimitResult(allowed=False, current_count=0, retry_after_seconds=None)
 
-            except _RateLimitExceeded as ex:
+            allowed = new_count is not None
+            current_count = new_count if allowed else (old_count or 0)
+
+            if not allowed:
                 retry_after = self._calculate_retry_after_seconds()
                 logger.warning(
                     "Rate limit exceeded",
                     api_key_id=str(api_key_id),
                     day=today.isoformat(),
-                    current_count=ex.old_count,
+                    current_count=current_count,
                     effective_limit=effective_limit,
                     requested_count=email_count,
                     retry_after_seconds=retry_after,
                 )
-                return RateLimitResult(allowed=False, current_count=ex.old_count, retry_after_seconds=retry_after)
-            except IntegrityError:
-                # Rare race when two transactions inserted the row at the same time.
-                # In that case, retry the operation once by selecting the row and
-                # applying the increment under a transaction.
-                # Rollback the failed transaction before retrying to ensure the
-                # session is clean; otherwise attempting to begin a new
-                # transaction can raise InvalidRequestError.
-                try:
-                    await self.db.rollback()
-                except Exception:
-                    # ignore rollback errors here; we'll surface the original problem
-                    pass
-
-                try:
-                    stmt = (
-                        select(DailyUsage)
-                        .where(DailyUsage.api_key_id == api_key_id, DailyUsage.day == today)
-                        .with_for_update()
-                    )
-                    res = await self.db.execute(stmt)
-                    usage = res.scalar_one_or_none()
-
-                    if usage is None:
-                        raise ValueError("DailyUsage row not found after FOR UPDATE lock")
-
-                    old_count = usage.count
-                    usage.count = usage.count + email_count
-                    new_count = usage.count
-
-                    if new_count > effective_limit:
-                        raise _RateLimitExceeded(old_count)
-
-                    logger.info(
-                        "Rate limit check passed (retry)",
-                        api_key_id=str(api_key_id),
-                        day=today.isoformat(),
-                        new_count=new_count,
-                        effective_limit=effective_limit,
-                        email_count=email_count,
-                    )
-                    return RateLimitResult(allowed=True, current_count=new_count, retry_after_seconds=None)
-
-                except _RateLimitExceeded as ex:
-                    retry_after = self._calculate_retry_after_seconds()
-                    logger.warning(
-                        "Rate limit exceeded (retry)",
-                        api_key_id=str(api_key_id),
-                        day=today.isoformat(),
-                        current_count=ex.old_count,
-                        effective_limit=effective_limit,
-                        requested_count=email_count,
-                        retry_after_seconds=retry_after,
-                    )
-                    return RateLimitResult(allowed=False, current_count=ex.old_count, retry_after_seconds=retry_after)
+                return RateLimitResult(allowed=False, current_count=current_count, retry_after_seconds=retry_after)
+
+            logger.info(
+                "Rate limit check passed",
+                api_key_id=str(api_key_id),
+                day=today.isoformat(),
+                new_count=current_count,
+                effective_limit=effective_limit,
+                email_count=email_count,
+            )
+            return RateLimitResult(allowed=True, current_count=current_count, retry_after_seconds=None)
 
         except Exception as e:
             logger.error(
@@ -169,6 +148,104 @@ class AtomicRateLimitService:
                 retry_after_seconds=self._calculate_retry_after_seconds(),
             )
 
+    async def check_and_increment_bulk(
+        self, items: Iterable[tuple[uuid.UUID, int]]
+    ) -> dict[uuid.UUID, RateLimitResult]:
+        """
+        Atomically check and increment daily usage for several API keys in one statement.
+
+        Counts for a repeated API key are summed, since a multi-row UPSERT may not touch
+        the same row twice. Each key is accepted or rejected on its own, exactly like
+        check_and_increment_rate_limit.
+
+        Returns:
+            dict: RateLimitResult per API key ID
+        """
+        today = date.today()  # UTC date
+
+        requested_counts: dict[uuid.UUID, int] = {}
+        for api_key_id, email_count in items:
+            requested_counts[api_key_id] = requested_counts.get(api_key_id, 0) + email_count
+
+        if not requested_counts:
+            return {}
+
+        try:
+            # Requested increments with each key's effective limit resolved alongside. The inner
+            # join drops unknown keys, so the INSERT never violates the foreign key; they are
+            # denied individually below, like check_and_increment_rate_limit does.
+            rows = values(
+                column("api_key_id", DailyUsage.api_key_id.type),
+                column("count", DailyUsage.count.type),
+                name="requested_rows",
+            ).data(list(requested_counts.items()))
+            requested = (
+                select(rows.c.api_key_id, rows.c.count, self._effective_daily_limit_clause().label("daily_limit"))
+                .select_from(rows.join(APIKey, APIKey.id == rows.c.api_key_id))
+                .cte("requested")
+            )
+
+            # Multi-row INSERT ... ON CONFLICT DO UPDATE, guarded per key by its limit
+            upsert = insert(DailyUsage).from_select(
+                ["api_key_id", "day", "count"],
+                select(requested.c.api_key_id, literal(today, DailyUsage.day.type), requested.c.count).where(
+                    requested.c.count <= requested.c.daily_limit
+                ),
+            )
+            upsert_stmt = upsert.on_conflict_do_update(
+                constraint="uq_daily_usage_api_key_day",
+                set_=dict(count=DailyUsage.count + upsert.excluded.count),
+                where=(DailyUsage.count + upsert.excluded.count) <= select(requested.c.daily_limit)
+                # Spelled out: a Core reference to excluded/daily_usage would be added to the FROM list
+                .where(requested.c.api_key_id == literal_column("excluded.api_key_id")).scalar_subquery(),
+            ).returning(DailyUsage.api_key_id, DailyUsage.count)
+            upserted = upsert_stmt.cte("upserted")
+
+            # One row per requested key: new count (NULL when rejected) and unchanged count
+            stmt = select(requested.c.api_key_id, upserted.c.count, DailyUsage.count).select_from(
+                requested.outerjoin(upserted, upserted.c.api_key_id == requested.c.api_key_id).outerjoin(
+                    DailyUsage, and_(DailyUsage.api_key_id == requested.c.api_key_id, DailyUsage.day == today)
+                )
+            )
+            res = await self.db.execute(stmt)
+
+            results: dict[uuid.UUID, RateLimitResult] = {}
+            retry_after = None
+            for api_key_id, new_count, old_count in res:
+                if new_count is not None:
+                    results[api_key_id] = RateLimitResult(allowed=True, current_count=new_count)
+                else:
+                    retry_after = retry_after or self._calculate_retry_after_seconds()
+                    results[api_key_id] = RateLimitResult(
+                        allowed=False, current_count=old_count or 0, retry_after_seconds=retry_after
+                    )
+
+            for api_key_id in requested_counts.keys() - results.keys():
+                logger.warning("Rate limit check for unknown API key", api_key_id=str(api_key_id))
+                results[api_key_id] = RateLimitResult(allowed=False, current_count=0, retry_after_seconds=None)
+
+            logger.info(
+                "Bulk rate limit check completed",
+                day=today.isoformat(),
+                key_count=len(results),
+                rejected=sum(1 for r in results.values() if not r.allowed),
+            )
+            return results
+
+        except Exception as e:
+            logger.error(
+                "Error in bulk atomic rate limit check",
+                day=today.isoformat(),
+                key_count=len(requested_counts),
+                error=str(e),
+            )
+            # On error, deny every request for safety
+            retry_after = self._calculate_retry_after_seconds()
+            return {
+                api_key_id: RateLimitResult(allowed=False, current_count=0, retry_after_seconds=retry_after)
+                for api_key_id in requested_counts
+            }
+
     async def log_successful_sends(
         self,
         api_key_id: uuid.UUID,
@@ -278,6 +355,13 @@ class AtomicRateLimitService:
             )
             return self.settings.default_daily_limit
 
+    def _effective_daily_limit_clause(self) -> ColumnElement[int]:
+        """SQL expression for the effective daily limit of the api_keys row in scope.
+
+        Mirrors _get_effective_daily_limit: non-positive or NULL limits fall back to the default.
+        """
+        return func.coalesce(case((APIKey.daily_limit > 0, APIKey.daily_limit)), self.settings.default_daily_limit)
+
     async def _get_current_usage(self, api_key_id: uuid.UUID, day: date) -> int:
         """Get current usage count for a specific day."""
         try:
@@ -297,10 +381,8 @@ class AtomicRateLimitService:
             return 0
 
     def _calculate_retry_after_seconds(self) -> int:
-        """Calculate seconds until next midnight UTC."""
-        now_utc = datetime.now(timezone.utc)
-        next_midnight = self._get_next_midnight_utc()
-        return int((next_midnight - now_utc).total_seconds())
+        """Calculate seconds until next midnight UTC, measured from the start of the current minute."""
+        return _retry_after_for_minute(int(time.time() // 60))
 
     def _get_next_midnight_utc(self) -> datetime:
         """Get next midnight in UTC."""
@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 import secrets
 import uuid
 from enum import Enum
@@ -5,7 +7,7 @@ from typing import Optional, Tuple
 
 import bcrypt
 import structlog
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import Settings
@@ -13,6 +15,18 @@ from app.models.api_key import APIKey
 
 logger = structlog.get_logger(__name__)
 
+# Prefix of bcrypt hashes ($2a$, $2b$, $2y$) stored before the switch to HMAC
+_BCRYPT_PREFIX = "$2"
+
+
+def hash_api_key(api_key: str, secret_key: str) -> str:
+    """Hash an API key with HMAC-SHA256 keyed by the application secret.
+
+    API keys are long random tokens, so a keyed fast hash is sufficient and, unlike
+    bcrypt, deterministic: the same key always maps to the same stored hash.
+    """
+    return hmac.new(secret_key.encode("utf-8"), api_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
 
 class AuthResult(Enum):
     """Authentication result types."""
@@ -28,13 +42,14 @@ class AuthService:
         self.settings = settings
 
     def _hash_api_key(self, api_key: str) -> str:
-        """Hash API key using bcrypt."""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(api_key.encode("utf-8"), salt).decode("utf-8")
+        """Hash API key using HMAC-SHA256 with the app secret key."""
+        return hash_api_key(api_key, self.settings.app_secret_key)
 
     def _verify_api_key(self, api_key: str, hashed: str) -> bool:
-        """Verify API key against hash."""
-        return bcrypt.checkpw(api_key.encode("utf-8"), hashed.encode("utf-8"))
+        """Verify API key against hash (constant-time; legacy bcrypt hashes are checked with bcrypt)."""
+        if hashed.startswith(_BCRYPT_PREFIX):
+            return bcrypt.checkpw(api_key.encode("utf-8"), hashed.encode("utf-8"))
+        return hmac.compare_digest(self._hash_api_key(api_key), hashed)
 
     async def validate_api_key_detailed(self, api_key: str) -> Tuple[AuthResult, Optional[APIKey]]:
         """Validate an API key and return detailed result.
@@ -43,29 +58,30 @@ class AuthService:
             tuple: (AuthResult, APIKey object if valid)
         """
         try:
-            # Get all API keys (both active and inactive)
-            stmt = select(APIKey)
+            # Deterministic hash -> single lookup on the unique key_hash index
+            stmt = select(APIKey).where(APIKey.key_hash == self._hash_api_key(api_key))
             result = await self.db.execute(stmt)
-            api_keys = result.scalars().all()
-
-            # Check each key hash
-            for key_obj in api_keys:
-                if self._verify_api_key(api_key, key_obj.key_hash):
-                    if key_obj.is_active:
-                        logger.info(
-                            "API key validated successfully",
-                            api_key_id=str(key_obj.id),
-                            name=key_obj.name,
-                            daily_limit=key_obj.daily_limit,
-                        )
-                        return (AuthResult.VALID, key_obj)
-                    else:
-                        logger.warning(
-                            "API key is inactive",
-                            api_key_id=str(key_obj.id),
-                            name=key_obj.name,
-                        )
-                        return (AuthResult.INACTIVE, None)
+            key_obj = result.scalar_one_or_none()
+
+            # Keys still stored with bcrypt are not found here; they must be moved to HMAC first with
+            # upgrade_legacy_api_key (scripts/migrate_legacy_api_keys.py), never scanned per request
+
+            if key_obj is not None:
+                if key_obj.is_active:
+                    logger.info(
+                        "API key validated successfully",
+                        api_key_id=str(key_obj.id),
+                        name=key_obj.name,
+                        daily_limit=key_obj.daily_limit,
+                    )
+                    return (AuthResult.VALID, key_obj)
+                else:
+                    logger.warning(
+                        "API key is inactive",
+                        api_key_id=str(key_obj.id),
+                        name=key_obj.name,
+                    )
+                    return (AuthResult.INACTIVE, None)
 
             logger.warning("Invalid API key")
             return (AuthResult.INVALID, None)
@@ -77,6 +93,35 @@ class AuthService:
             )
             return (AuthResult.INVALID, None)
 
+    async def upgrade_legacy_api_key(self, api_key: str) -> Optional[APIKey]:
+        """Rewrite a key stored with bcrypt before the HMAC switch to its HMAC hash.
+
+        bcrypt hashes are salted, so the matching row can only be found by checking every legacy
+        row. This is for the one-time migration script, never for request authentication.
+
+        Returns:
+            The upgraded APIKey, or None if no legacy key matches
+        """
+        stmt = select(APIKey).where(APIKey.key_hash.startswith(_BCRYPT_PREFIX, autoescape=True))
+        result = await self.db.execute(stmt)
+
+        for key_obj in result.scalars():
+            if self._verify_api_key(api_key, key_obj.key_hash):
+                key_obj.key_hash = self._hash_api_key(api_key)
+                await self.db.flush()
+
+                logger.info("Legacy API key rehashed", api_key_id=str(key_obj.id), name=key_obj.name)
+                return key_obj
+        return None
+
+    async def count_legacy_api_keys(self) -> int:
+        """Number of keys still stored with bcrypt, which cannot authenticate until upgraded."""
+        stmt = (
+            select(func.count()).select_from(APIKey).where(APIKey.key_hash.startswith(_BCRYPT_PREFIX, autoescape=True))
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
     async def validate_api_key(self, api_key: str) -> Optional[APIKey]:
         """Validate an API key and return the APIKey object if valid."""
         result, key_obj = await self.validate_api_key_detailed(api_key)
@@ -106,10 +151,6 @@ class AuthService:
             )
             daily_limit = None
 
-        # Normalize allowed_recipients: lower-case and strip
-        if allowed_recipients:
-            allowed_recipients = [e.strip().lower() for e in allowed_recipients if e and e.strip()]
-
         # Create API key object
         key_obj = APIKey(
             key_hash=key_hash,
@@ -122,6 +163,10 @@ class AuthService:
         self.db.add(key_obj)
         await self.db.flush()
 
+        # allowed_recipients is normalized by the api_keys trigger; load the stored value back
+        if allowed_recipients:
+            await self.db.refresh(key_obj, attribute_names=["allowed_recipients"])
+
         logger.info(
             "API key created",
             api_key_id=str(key_obj.id),
@@ -1,3 +1,4 @@
+import re
 from typing import List, Optional
 
 import structlog
@@ -6,35 +7,42 @@ from app.core.config import Settings
 
 logger = structlog.get_logger(__name__)
 
+# local@domain with exactly one "@" and no whitespace; captures the domain
+_EMAIL_DOMAIN_RE = re.compile(r"^[^@\s]+@([^@\s]+)$")
+
 
 class DomainValidationService:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.allowed_domains = settings.allow_domains
+        # Lower-cased once so each check is a single hash lookup
+        self._allowed: Optional[frozenset[str]] = (
+            frozenset(d.lower() for d in self.allowed_domains) if self.allowed_domains else None
+        )
 
     def is_domain_allowed(self, email: str) -> bool:
         """Check if email domain is allowed."""
-        if not self.allowed_domains:
+        if self._allowed is None:
             # If no domain restrictions, allow all
             return True
 
-        try:
-            domain = email.split("@")[1].lower()
-            is_allowed = domain in [d.lower() for d in self.allowed_domains]
+        match = _EMAIL_DOMAIN_RE.match(email) if isinstance(email, str) else None
+        if match is None:
+            logger.error("Invalid email format", email=email)
+            return False
 
-            if not is_allowed:
-                logger.warning(
-                    "Email domain not allowed",
-                    email=email,
-                    domain=domain,
-                    allowed_domains=self.allowed_domains,
-                )
+        domain = match.group(1).lower()
+        is_allowed = domain in self._allowed
 
-            return is_allowed
+        if not is_allowed:
+            logger.warning(
+                "Email domain not allowed",
+                email=email,
+                domain=domain,
+                allowed_domains=self.allowed_domains,
+            )
 
-        except (IndexError, AttributeError):
-            logger.error("Invalid email format", email=email)
-            return False
+        return is_allowed
 
     def filter_allowed_emails(self, emails: List[str]) -> tuple[List[str], List[str]]:
         """Filter emails by allowed domains.
@@ -42,17 +50,12 @@ class DomainValidationService:
         Returns:
             tuple: (allowed_emails, rejected_emails)
         """
-        if not self.allowed_domains:
+        if self._allowed is None:
             return emails, []
 
-        allowed = []
-        rejected = []
-
-        for email in emails:
-            if self.is_domain_allowed(email):
-                allowed.append(email)
-            else:
-                rejected.append(email)
+        verdicts = [self.is_domain_allowed(email) for email in emails]
+        allowed = [email for email, ok in zip(emails, verdicts) if ok]
+        rejected = [email for email, ok in zip(emails, verdicts) if not ok]
 
         if rejected:
             logger.info(
@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import Settings
 from app.models.send_log import SendLog
-from app.services.mailer import MailerService
+from app.services.mailer import MailerService, get_smtp_pool
 
 logger = structlog.get_logger(__name__)
 
@@ -18,7 +18,7 @@ class EmailQueueService:
     def __init__(self, db: AsyncSession, settings: Settings):
         self.db = db
         self.settings = settings
-        self.mailer = MailerService(settings)
+        self.mailer = MailerService(settings, pool=get_smtp_pool(settings))
 
     async def create_send_log(self, api_key_id: uuid.UUID, recipient: str) -> int:
         """Create a SendLog entry with null message_id."""
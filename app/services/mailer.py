@@ -1,4 +1,7 @@
+import asyncio
+import re
 import uuid
+from email.message import Message
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Dict, List, Optional, Union
@@ -10,12 +13,121 @@ from app.core.config import Settings
 
 logger = structlog.get_logger(__name__)
 
+# "Message-ID: <id>" in an SMTP server response; captures the id without angle brackets
+_MESSAGE_ID_RE = re.compile(r"Message-ID:\s*<([^>]+)>")
+
+
+class SMTPConnectionPool:
+    """Authenticated SMTP connections reused across sends.
+
+    At most ``smtp_pool_size`` connections are open at once. Each one is retired after
+    ``smtp_pool_max_messages`` messages so long-lived sessions get recycled.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._slots = asyncio.Semaphore(settings.smtp_pool_size)
+        # Idle connections with the number of messages already sent over each
+        self._idle: List[tuple[aiosmtplib.SMTP, int]] = []
+
+    async def send_message(self, msg: Message) -> tuple[dict, str]:
+        """Send a message over a pooled connection, opening one if none is idle."""
+        async with self._slots:
+            smtp, sent = await self._acquire()
+            try:
+                result = await smtp.send_message(msg)
+            except aiosmtplib.SMTPServerDisconnected:
+                if sent == 0:
+                    raise
+                # The server dropped the idle connection; retry once on a fresh one
+                smtp, sent = await self._connect(), 0
+                try:
+                    result = await smtp.send_message(msg)
+                except Exception:
+                    smtp.close()
+                    raise
+            except Exception:
+                smtp.close()
+                raise
+
+            sent += 1
+            if sent >= self.settings.smtp_pool_max_messages:
+                await self._quit(smtp)
+            else:
+                self._idle.append((smtp, sent))
+            return result
+
+    async def close(self) -> None:
+        """Close every idle connection."""
+        idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            await self._quit(smtp)
+
+    async def __aenter__(self) -> "SMTPConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _acquire(self) -> tuple[aiosmtplib.SMTP, int]:
+        while self._idle:
+            smtp, sent = self._idle.pop()
+            if smtp.is_connected:
+                return smtp, sent
+        return await self._connect(), 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        # connect() runs EHLO, STARTTLS and AUTH, which is the per-send cost the pool saves
+        smtp = aiosmtplib.SMTP(
+            hostname=self.settings.smtp_host,
+            port=self.settings.smtp_port,
+            username=self.settings.smtp_user,
+            password=self.settings.smtp_password,
+            start_tls=self.settings.smtp_starttls,
+            use_tls=False,  # Use STARTTLS instead of implicit TLS
+        )
+        await smtp.connect()
+        logger.debug("Opened pooled SMTP connection", smtp_host=self.settings.smtp_host)
+        return smtp
+
+    @staticmethod
+    async def _quit(smtp: aiosmtplib.SMTP) -> None:
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            smtp.close()
+
+
+_shared_pool: Optional[SMTPConnectionPool] = None
+
+
+def get_smtp_pool(settings: Settings) -> SMTPConnectionPool:
+    """Process-wide SMTP connection pool, created on first use."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = SMTPConnectionPool(settings)
+    return _shared_pool
+
+
+async def close_smtp_pool() -> None:
+    """Close the process-wide SMTP connection pool, if one was created."""
+    global _shared_pool
+    if _shared_pool is not None:
+        pool, _shared_pool = _shared_pool, None
+        await pool.close()
+
 
 class MailerService:
     """SMTP email service using aiosmtplib with domain allowlist support."""
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, pool: Optional[SMTPConnectionPool] = None):
         self.settings = settings
+        # Without a pool every send opens (and closes) its own SMTP connection
+        self.pool = pool
+        # Lower-cased once so each recipient check is a single hash lookup
+        self._allowed_domains: Optional[frozenset[str]] = (
+            frozenset(d.lower() for d in settings.allow_domains) if settings.allow_domains else None
+        )
 
     async def send_email(
         self,
@@ -47,7 +159,7 @@ class MailerService:
             raise ValueError("Either HTML or text body is required")
 
         # Domain allowlist check
-        if self.settings.allow_domains:
+        if self._allowed_domains is not None:
             for email in to:
                 if not self._is_domain_allowed(email):
                     raise ValueError(f"Domain not allowed for recipient: {email}")
@@ -102,15 +214,18 @@ class MailerService:
             )
 
             # Send email with STARTTLS if configured
-            result = await aiosmtplib.send(
-                msg,
-                hostname=self.settings.smtp_host,
-                port=self.settings.smtp_port,
-                username=self.settings.smtp_user,
-                password=self.settings.smtp_password,
-                start_tls=self.settings.smtp_starttls,
-                use_tls=False,  # Use STARTTLS instead of implicit TLS
-            )
+            if self.pool is not None:
+                result = await self.pool.send_message(msg)
+            else:
+                result = await aiosmtplib.send(
+                    msg,
+                    hostname=self.settings.smtp_host,
+                    port=self.settings.smtp_port,
+                    username=self.settings.smtp_user,
+                    password=self.settings.smtp_password,
+                    start_tls=self.settings.smtp_starttls,
+                    use_tls=False,  # Use STARTTLS instead of implicit TLS
+                )
 
             # Extract message ID from SMTP response
             message_id = self._extract_message_id(result) or f"msg_{uuid.uuid4().hex[:12]}"
@@ -137,30 +252,24 @@ class MailerService:
 
     def _is_domain_allowed(self, email: str) -> bool:
         """Check if email domain is in allowlist."""
-        if not self.settings.allow_domains:
+        if self._allowed_domains is None:
             return True
 
-        domain = email.split("@")[-1].lower()
-        allowed_domains = [d.lower() for d in self.settings.allow_domains]
-        return domain in allowed_domains
+        return email.split("@")[-1].lower() in self._allowed_domains
 
     def _extract_message_id(self, smtp_result) -> Optional[str]:
         """Extract message ID from SMTP result."""
-        try:
-            # aiosmtplib returns a dict with server responses
-            if hasattr(smtp_result, "get"):
-                # Look for message ID in server response
-                for recipient, (code, message) in smtp_result.items():
-                    if isinstance(message, str) and "Message-ID" in message:
-                        # Extract Message-ID from response if present
-                        import re
-
-                        match = re.search(r"Message-ID:\s*<([^>]+)>", message)
-                        if match:
-                            return match.group(1)
-
-            # Fallback: generate unique ID based on timestamp
+        # aiosmtplib.send and SMTP.send_message return (rejected recipients, DATA response message).
+        # Checked up front rather than caught, so the per-send path never raises internally.
+        if not isinstance(smtp_result, tuple) or len(smtp_result) != 2:
             return None
 
-        except Exception:
-            return None
+        # Servers that report the queued message's ID do so in the reply to DATA
+        _, message = smtp_result
+        if isinstance(message, str) and "Message-ID" in message:
+            match = _MESSAGE_ID_RE.search(message)
+            if match:
+                return match.group(1)
+
+        # Caller falls back to a generated ID
+        return None
@@ -1,6 +1,7 @@
+import time
 from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, List, Union
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
 
 import structlog
 
@@ -8,40 +9,43 @@ from app.core.config import Settings
 
 logger = structlog.get_logger(__name__)
 
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _day_number(timestamp: float) -> int:
+    """UTC day of a Unix timestamp, as whole days since the epoch."""
+    return int(timestamp // SECONDS_PER_DAY)
+
 
 class RateLimitService:
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.requests: Dict[str, List[datetime]] = defaultdict(list)  # Ensure value type is List[datetime]
-
-        # Add runtime validation for dictionary structure
-        if not all(
-            isinstance(k, str) and all(isinstance(v, datetime) for v in vals) for k, vals in self.requests.items()
-        ):
-            raise TypeError(
-                "Invalid dictionary structure for `self.requests`. "
-                "Keys must be str and values must be List[datetime]."
-            )
+        # Emails sent per API key per UTC day number; only the count in the window matters, not individual sends
+        self.counts: Dict[str, Dict[int, int]] = defaultdict(dict)
+
+        logger.debug("Initializing rate limit counters", window_days=self.settings.rate_window_days)
 
-        logger.debug("Initializing requests dictionary", structure=self.requests)
+    def current_usage(self, api_key: str, now: Optional[float] = None) -> int:
+        """Number of emails recorded for an API key within the rate window."""
+        window_start = self._window_start(time.time() if now is None else now)
+        return sum(count for day, count in self.counts[api_key].items() if day > window_start)
 
     async def check_daily_limit(self, api_key: str, email_count: int = 1) -> bool:
         """Check if API key is within daily email limits."""
-        now = datetime.utcnow()
+        now = time.time()
 
         # Clean old requests
         await self._cleanup_old_requests(api_key, now)
 
-        # Get recent requests within the rate window
-        window_start = now - timedelta(days=self.settings.rate_window_days)
-        recent_requests = [req for req in self.requests[api_key] if req > window_start]
+        # After cleanup every remaining bucket is within the rate window
+        current_count = sum(self.counts[api_key].values())
 
         # Check if adding new emails would exceed daily limit
-        if len(recent_requests) + email_count > self.settings.default_daily_limit:
+        if current_count + email_count > self.settings.default_daily_limit:
             logger.warning(
                 "Daily rate limit exceeded",
                 api_key=api_key[:8] + "...",
-                current_count=len(recent_requests),
+                current_count=current_count,
                 requested_count=email_count,
                 limit=self.settings.default_daily_limit,
                 window_days=self.settings.rate_window_days,
@@ -52,48 +56,51 @@ class RateLimitService:
 
     async def record_emails(self, api_key: str, email_count: int) -> None:
         """Record email sends for rate limiting."""
-        now = datetime.utcnow()
-
-        # Add one entry per email sent
-        for _ in range(email_count):
-            if not isinstance(now, datetime):
-                logger.error("Invalid type for timestamp", value_type=type(now))
-                raise TypeError("Expected a datetime object for email record timestamp")
-            self.requests[api_key].append(now)  # Ensure only datetime objects are appended
-            logger.debug(
-                "Appending request timestamp",
-                api_key=api_key[:8] + "...",
-                timestamp=now.isoformat(),
-                value_type=type(now),
-            )
+        today = _day_number(time.time())
+
+        if email_count:
+            buckets = self.counts[api_key]
+            buckets[today] = buckets.get(today, 0) + email_count
 
         logger.debug(
             "Emails recorded for rate limiting",
             api_key=api_key[:8] + "...",
             count=email_count,
-            timestamp=now.isoformat(),
+            day=today,
         )
 
-    async def _cleanup_old_requests(self, api_key: str, now: datetime) -> None:
-        """Remove requests older than the rate window."""
-        window_start = now - timedelta(days=self.settings.rate_window_days)
-        self.requests[api_key] = [req for req in self.requests[api_key] if req > window_start]
+    async def _cleanup_old_requests(self, api_key: str, now: float) -> None:
+        """Drop day buckets that have fallen out of the rate window."""
+        window_start = self._window_start(now)
+        buckets = self.counts[api_key]
+        for day in [day for day in buckets if day <= window_start]:
+            del buckets[day]
+
+    def _window_start(self, now: float) -> int:
+        """Last UTC day outside the rate window; buckets for later days are counted."""
+        return _day_number(now) - self.settings.rate_window_days
 
     async def get_remaining_quota(self, api_key: str) -> Dict[str, Union[str, int]]:
         """Get remaining email quota for an API key."""
-        now = datetime.utcnow()
+        now = time.time()
         await self._cleanup_old_requests(api_key, now)
 
         # Count emails in current window
-        window_start = now - timedelta(days=self.settings.rate_window_days)
-        used_emails = len([req for req in self.requests[api_key] if req > window_start])
+        buckets = self.counts[api_key]
+        used_emails = sum(buckets.values())
 
         remaining = max(0, self.settings.default_daily_limit - used_emails)
 
+        # Quota frees up when the oldest bucket in the window expires, at UTC midnight
+        oldest_day = min(buckets, default=_day_number(now))
+        resets_at = datetime.fromtimestamp(
+            (oldest_day + self.settings.rate_window_days) * SECONDS_PER_DAY, tz=timezone.utc
+        )
+
         return {
             "remaining": remaining,
             "used": used_emails,
             "limit": self.settings.default_daily_limit,
             "window_days": self.settings.rate_window_days,
-            "resets_at": (window_start + timedelta(days=self.settings.rate_window_days)).isoformat(),
+            "resets_at": resets_at.isoformat(),
         }
@@ -1,9 +1,9 @@
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import Optional
 
 import structlog
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -51,11 +51,35 @@ class UsageTrackingService:
             )
             return 0
 
+    async def get_limit_and_usage(self, api_key_id: uuid.UUID, day: date) -> tuple[int, int]:
+        """Get the daily limit and the email count for a day in a single query."""
+        try:
+            stmt = (
+                select(
+                    func.coalesce(APIKey.daily_limit, self.settings.default_daily_limit),
+                    func.coalesce(DailyUsage.count, 0),
+                )
+                .select_from(APIKey)
+                .outerjoin(DailyUsage, and_(DailyUsage.api_key_id == APIKey.id, DailyUsage.day == day))
+                .where(APIKey.id == api_key_id)
+            )
+            result = await self.db.execute(stmt)
+            row = result.one_or_none()
+
+            # Unknown API key: default limit, nothing sent
+            if row is None:
+                return self.settings.default_daily_limit, 0
+            daily_limit, count = row
+            return daily_limit, count
+
+        except Exception as e:
+            logger.error("Error getting daily limit and usage", api_key_id=str(api_key_id), day=day, error=str(e))
+            return self.settings.default_daily_limit, 0
+
     async def check_daily_limit(self, api_key_id: uuid.UUID, email_count: int = 1) -> bool:
         """Check if sending emails would exceed daily limit."""
         today = date.today()
-        current_usage = await self.get_usage_for_day(api_key_id, today)
-        daily_limit = await self.get_daily_limit(api_key_id)
+        daily_limit, current_usage = await self.get_limit_and_usage(api_key_id, today)
 
         would_exceed = (current_usage + email_count) > daily_limit
 
@@ -77,7 +101,7 @@ class UsageTrackingService:
         message_id: Optional[str] = None,
     ) -> None:
         """Record email sends in both send log and daily usage."""
-        sent_at = datetime.utcnow()
+        sent_at = datetime.now(timezone.utc)
         today = date.today()
         email_count = len(recipients)
 
@@ -124,8 +148,7 @@ class UsageTrackingService:
 
         try:
             # Get today's usage
-            current_usage = await self.get_usage_for_day(api_key_id, today)
-            daily_limit = await self.get_daily_limit(api_key_id)
+            daily_limit, current_usage = await self.get_limit_and_usage(api_key_id, today)
 
             # Get total emails sent
             stmt = select(func.count(SendLog.id)).where(SendLog.api_key_id == api_key_id)
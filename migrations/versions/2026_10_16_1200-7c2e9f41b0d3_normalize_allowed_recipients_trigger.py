@@ -0,0 +1,53 @@
+"""normalize allowed_recipients trigger
+
+Revision ID: 7c2e9f41b0d3
+Revises: 3a6d49148851
+Create Date: 2026-10-16 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9f41b0d3'
+down_revision = '3a6d49148851'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lower-case and trim whitespace (spaces, tabs, CR, LF) from every allowed recipient, dropping blanks,
+    # whichever code path writes the row.
+    # Must match the after_create DDL in app/models/api_key.py (checked by tests/unit/models/test_api_key.py).
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION mailer.normalize_allowed_recipients() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.allowed_recipients IS NOT NULL AND jsonb_typeof(NEW.allowed_recipients) = 'array' THEN
+                NEW.allowed_recipients := COALESCE(
+                    (
+                        SELECT jsonb_agg(lower(btrim(t.recipient, E' \\t\\r\\n')) ORDER BY t.ord)
+                        FROM jsonb_array_elements_text(NEW.allowed_recipients) WITH ORDINALITY AS t(recipient, ord)
+                        WHERE btrim(t.recipient, E' \\t\\r\\n') <> ''
+                    ),
+                    '[]'::jsonb
+                );
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_api_keys_normalize_allowed_recipients
+        BEFORE INSERT OR UPDATE OF allowed_recipients ON mailer.api_keys
+        FOR EACH ROW EXECUTE FUNCTION mailer.normalize_allowed_recipients()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_api_keys_normalize_allowed_recipients ON mailer.api_keys")
+    op.execute("DROP FUNCTION IF EXISTS mailer.normalize_allowed_recipients()")
@@ -6,13 +6,14 @@ Creates a predictable API key for easy testing.
 
 import asyncio
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 
-import bcrypt
 from sqlalchemy import select
 
+from app.core.config import get_settings
 from app.db.session import get_async_session
 from app.models.api_key import APIKey
+from app.services.auth import hash_api_key
 
 # Add the app directory to Python path
 sys.path.insert(0, ".")
@@ -24,8 +25,7 @@ async def create_demo_api_key():
     demo_key = "sk_test_demo_key_12345"
 
     # Hash the demo key
-    salt = bcrypt.gensalt()
-    key_hash = bcrypt.hashpw(demo_key.encode("utf-8"), salt).decode("utf-8")
+    key_hash = hash_api_key(demo_key, get_settings().app_secret_key)
 
     # Create demo API key record
     api_key = APIKey(
@@ -33,7 +33,7 @@ async def create_demo_api_key():
         key_hash=key_hash,
         daily_limit=100,
         is_active=True,
-        created_at=datetime.utcnow(),
+        created_at=datetime.now(timezone.utc),
     )
 
     # Save to database
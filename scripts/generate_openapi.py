@@ -32,7 +32,7 @@ A production-ready email service API built with FastAPI.
 
 ## Features
 
-- 🔐 **Secure Authentication**: API key-based authentication with bcrypt hashing
+- 🔐 **Secure Authentication**: API key-based authentication with HMAC-SHA256 key hashing
 - ⚡ **Rate Limiting**: Atomic rate limiting per API key with PostgreSQL
 - 📧 **Reliable Email Delivery**: SMTP with STARTTLS encryption
 - 📊 **Comprehensive Observability**: Prometheus metrics and structured logging
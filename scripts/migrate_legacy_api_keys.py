@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+One-time migration of API keys stored with bcrypt to HMAC-SHA256 hashes.
+
+Requests only look keys up by their HMAC hash, so a key still stored with bcrypt
+stops authenticating until it is migrated. bcrypt hashes are salted and cannot be
+converted without the plaintext key: pipe the plaintext keys you hold, one per line:
+
+    python scripts/migrate_legacy_api_keys.py < legacy_keys.txt
+
+Keys that remain on bcrypt afterwards must be reissued.
+"""
+
+import asyncio
+import sys
+
+from app.core.config import get_settings
+from app.db.session import get_async_session
+from app.services.auth import AuthService
+
+# Add the app directory to Python path
+sys.path.insert(0, ".")
+
+
+async def migrate(plain_keys: list[str]) -> tuple[int, int]:
+    """Rehash every matching legacy key and return (migrated, still_legacy)."""
+    migrated = 0
+    async for session in get_async_session():
+        auth_service = AuthService(session, get_settings())
+
+        for plain_key in plain_keys:
+            if await auth_service.upgrade_legacy_api_key(plain_key) is not None:
+                migrated += 1
+        await session.commit()
+
+        return migrated, await auth_service.count_legacy_api_keys()
+
+    return migrated, 0
+
+
+async def main() -> None:
+    """Read plaintext keys from stdin and migrate them."""
+    plain_keys = [line.strip() for line in sys.stdin if line.strip()]
+    if not plain_keys:
+        print("No API keys given on stdin")
+        sys.exit(1)
+
+    try:
+        migrated, remaining = await migrate(plain_keys)
+    except Exception:
+        print("Failed to migrate API keys")
+        sys.exit(1)
+
+    print("Migrated {} of {} key(s) to HMAC-SHA256".format(migrated, len(plain_keys)))
+    if remaining:
+        print("{} key(s) are still stored with bcrypt and must be reissued".format(remaining))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
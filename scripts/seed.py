@@ -9,13 +9,13 @@ import asyncio
 import secrets
 import string
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-import bcrypt
-
+from app.core.config import get_settings
 from app.db.session import get_async_session
 from app.models.api_key import APIKey
+from app.services.auth import hash_api_key
 
 # Add the app directory to Python path
 sys.path.insert(0, ".")
@@ -43,8 +43,7 @@ async def create_api_key(name: str, daily_limit: Optional[int] = None, is_active
     plain_key = generate_api_key(32)
 
     # Hash the API key
-    salt = bcrypt.gensalt()
-    key_hash = bcrypt.hashpw(plain_key.encode("utf-8"), salt).decode("utf-8")
+    key_hash = hash_api_key(plain_key, get_settings().app_secret_key)
 
     # Use default daily limit if not specified
     if daily_limit is None:
@@ -56,7 +55,7 @@ async def create_api_key(name: str, daily_limit: Optional[int] = None, is_active
         key_hash=key_hash,
         daily_limit=daily_limit,
         is_active=is_active,
-        created_at=datetime.utcnow(),
+        created_at=datetime.now(timezone.utc),
     )
 
     # Save to database
@@ -369,3 +369,15 @@ class TestMailEndpoint:
         # Should succeed (or return appropriate status if not supported)
         # 202 = accepted (custom from fields ignored), 400/422 = validation error
         assert response.status_code in [200, 202, 400, 422]
+
+    @pytest.mark.asyncio
+    async def test_send_email_request_too_large(self, test_client: AsyncClient, test_api_key: str, test_settings):
+        """Test oversized requests are rejected with a JSON error body."""
+        response = await test_client.post(
+            "/api/v1/send",
+            headers={"X-API-Key": test_api_key.raw_key, "Content-Type": "application/json"},
+            content=b"x" * (test_settings.max_request_size + 1),
+        )
+
+        assert response.status_code == 413
+        assert response.json()["detail"].startswith("Request entity too large")
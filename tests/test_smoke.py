@@ -8,6 +8,7 @@ This test should always pass and is used to verify:
 """
 
 import pytest
+from sqlalchemy import text
 
 
 @pytest.mark.unit
@@ -35,6 +36,18 @@ async def test_db_session_fixture(db_session):
     assert db_session.is_active
 
 
+@pytest.mark.unit
+@pytest.mark.database
+async def test_db_session_commit_keeps_outer_transaction(db_session):
+    """Test that commit() inside a test only releases a SAVEPOINT."""
+    await db_session.execute(text("SELECT 1"))
+    await db_session.commit()
+
+    # The connection's outer transaction is still open and is rolled back at teardown
+    connection = await db_session.connection()
+    assert connection.in_transaction()
+
+
 @pytest.mark.unit
 def test_mock_smtp_fixture(mock_smtp):
     """Test that mock SMTP fixture works."""
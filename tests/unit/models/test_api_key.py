@@ -1,18 +1,42 @@
 """Unit tests for APIKey model."""
 
+import importlib.util
+import time
 import uuid
 from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
 
-from app.models.api_key import APIKey
+from app.models.api_key import (
+    NORMALIZE_ALLOWED_RECIPIENTS_FUNCTION,
+    NORMALIZE_ALLOWED_RECIPIENTS_TRIGGER,
+    APIKey,
+    uuid7,
+)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[3] / "migrations" / "versions"
 
 
 class TestAPIKeyModel:
     """Tests for APIKey model creation and validation."""
 
+    def test_uuid7_is_time_ordered(self):
+        """Test that generated IDs are RFC 9562 version 7 UUIDs ordered by creation time."""
+        before_ms = time.time_ns() // 1_000_000
+        first = uuid7()
+        time.sleep(0.002)
+        second = uuid7()
+
+        assert first.version == 7
+        assert first.variant == uuid.RFC_4122
+        assert first.int >> 80 >= before_ms  # 48-bit millisecond timestamp prefix
+        assert first < second
+
     async def test_create_api_key_minimal(self, db_session):
         """Test creating an API key with minimal required fields."""
         api_key = APIKey(key_hash="test_hash_123", name="Test Key")
@@ -242,3 +266,65 @@ class TestAPIKeyFieldValidation:
         await db_session.refresh(api_key)
 
         assert api_key.daily_limit == -1
+
+
+class TestAPIKeyAllowedRecipientsTrigger:
+    """Tests for the trigger that normalizes allowed_recipients on write."""
+
+    async def test_trigger_normalizes_on_insert(self, db_session):
+        """Test recipients are lower-cased, trimmed and blanks dropped for a direct model insert."""
+        api_key = APIKey(
+            key_hash="trigger_insert_hash",
+            name="Trigger Insert Key",
+            allowed_recipients=["  User1@Example.COM ", "", "   ", "user2@example.com"],
+        )
+        db_session.add(api_key)
+        await db_session.commit()
+        await db_session.refresh(api_key)
+
+        assert api_key.allowed_recipients == ["user1@example.com", "user2@example.com"]
+
+    async def test_trigger_trims_all_whitespace(self, db_session):
+        """Test tabs, carriage returns and newlines are trimmed like spaces, and whitespace-only entries dropped."""
+        api_key = APIKey(
+            key_hash="trigger_whitespace_hash",
+            name="Trigger Whitespace Key",
+            allowed_recipients=["\tUser@Example.com\r\n", "\n", " \t\r\n ", "\ta@example.com"],
+        )
+        db_session.add(api_key)
+        await db_session.commit()
+        await db_session.refresh(api_key)
+
+        assert api_key.allowed_recipients == ["user@example.com", "a@example.com"]
+
+    async def test_trigger_normalizes_on_update(self, db_session):
+        """Test an UPDATE of allowed_recipients is normalized too, keeping order."""
+        api_key = APIKey(key_hash="trigger_update_hash", name="Trigger Update Key", allowed_recipients=[])
+        db_session.add(api_key)
+        await db_session.commit()
+
+        api_key.allowed_recipients = ["B@EXAMPLE.COM", " a@example.com"]
+        await db_session.commit()
+        await db_session.refresh(api_key)
+
+        assert api_key.allowed_recipients == ["b@example.com", "a@example.com"]
+
+    def test_migration_matches_model_ddl(self):
+        """Test the migration installs the same function and trigger as the model's after_create DDL."""
+        path = next(MIGRATIONS_DIR.glob("*-7c2e9f41b0d3_*.py"))
+        spec = importlib.util.spec_from_file_location("migration_7c2e9f41b0d3", path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+
+        executed: list[str] = []
+        migration.op = SimpleNamespace(execute=executed.append)
+        migration.upgrade()
+
+        def normalized(sql: str) -> str:
+            return " ".join(sql.split())
+
+        expected = [
+            str(ddl.against(APIKey.__table__).compile(dialect=postgresql.dialect()))
+            for ddl in (NORMALIZE_ALLOWED_RECIPIENTS_FUNCTION, NORMALIZE_ALLOWED_RECIPIENTS_TRIGGER)
+        ]
+        assert [normalized(sql) for sql in executed] == [normalized(sql) for sql in expected]
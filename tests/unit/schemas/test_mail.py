@@ -17,141 +17,121 @@ from pydantic import ValidationError
 from app.schemas.mail import HealthResponse, MailRequest, MailResponse, SendLogResponse
 
 
-@pytest.mark.unit
-class TestMailRequest:
-    """Tests for MailRequest schema."""
-
-    def test_mail_request_valid_html_only(self):
-        """Test MailRequest with HTML body only."""
-        data = {
-            "to": "test@example.com",
-            "subject": "Test Subject",
-            "html": "<h1>Hello</h1>",
-        }
+@pytest.fixture(scope="module")
+def fixed_now() -> datetime:
+    """A frozen timestamp shared by the response schema tests."""
+    return datetime(2024, 1, 1, 12, 0, 0)
 
-        request = MailRequest(**data)
 
-        assert request.to == "test@example.com"
-        assert request.subject == "Test Subject"
-        assert request.html == "<h1>Hello</h1>"
-        assert request.text is None
+@pytest.fixture(scope="module")
+def validate_mail_request():
+    """MailRequest's compiled core validator (skips BaseModel.__init__ kwarg dispatch)."""
+    return MailRequest.__pydantic_validator__.validate_python
 
-    def test_mail_request_valid_text_only(self):
-        """Test MailRequest with text body only."""
-        data = {
-            "to": "test@example.com",
-            "subject": "Test Subject",
-            "text": "Hello World",
-        }
 
-        request = MailRequest(**data)
+@pytest.fixture(scope="module")
+def valid_mail() -> MailRequest:
+    """A pre-validated MailRequest template; derive variations from model_dump() through validation."""
+    return MailRequest(to="test@example.com", subject="Test Subject", html="<h1>Hello</h1>")
 
-        assert request.to == "test@example.com"
-        assert request.subject == "Test Subject"
-        assert request.html is None
-        assert request.text == "Hello World"
 
-    def test_mail_request_valid_both_formats(self):
-        """Test MailRequest with both HTML and text."""
-        data = {
-            "to": "test@example.com",
-            "subject": "Test Subject",
-            "html": "<h1>Hello</h1>",
-            "text": "Hello World",
-        }
+@pytest.mark.unit
+class TestMailRequest:
+    """Tests for MailRequest schema."""
 
-        request = MailRequest(**data)
+    @pytest.mark.parametrize(
+        "html,text",
+        [
+            ("<h1>Hello</h1>", None),
+            (None, "Hello World"),
+            ("<h1>Hello</h1>", "Hello World"),
+        ],
+        ids=["html_only", "text_only", "both_formats"],
+    )
+    def test_mail_request_valid_body(self, validate_mail_request, html, text):
+        """Test MailRequest with HTML, text, or both bodies."""
+        data = {"to": "test@example.com", "subject": "Test Subject"}
+        # Omit absent bodies rather than passing None (defaults are not validated)
+        if html is not None:
+            data["html"] = html
+        if text is not None:
+            data["text"] = text
+
+        request = validate_mail_request(data)
 
-        assert request.html == "<h1>Hello</h1>"
-        assert request.text == "Hello World"
+        assert request.to == "test@example.com"
+        assert request.subject == "Test Subject"
+        assert request.html == html
+        assert request.text == text
 
-    def test_mail_request_with_custom_headers(self):
+    def test_mail_request_with_custom_headers(self, valid_mail):
         """Test MailRequest with custom headers."""
-        data = {
-            "to": "test@example.com",
-            "subject": "Test Subject",
-            "html": "<h1>Hello</h1>",
-            "headers": {"X-Custom": "value", "X-Priority": "high"},
-        }
-
-        request = MailRequest(**data)
+        # Build through validation: model_copy(update=...) would skip checking the headers field
+        request = MailRequest.model_validate(
+            {**valid_mail.model_dump(), "headers": {"X-Custom": "value", "X-Priority": "high"}}
+        )
 
+        assert request.to == valid_mail.to
         assert request.headers == {"X-Custom": "value", "X-Priority": "high"}
 
-    def test_mail_request_invalid_no_body(self):
-        """Test MailRequest fails when neither HTML nor text provided."""
+    def test_mail_request_rejects_non_string_header_values(self, valid_mail):
+        """Test header values must be strings."""
+        with pytest.raises(ValidationError):
+            MailRequest.model_validate({**valid_mail.model_dump(), "headers": {"X-Priority": ["high"]}})
+
+    @pytest.mark.parametrize(
+        "overrides,field,message",
+        [
+            ({"html": None, "text": None}, "html", "Either html or text body is required"),
+            ({"to": "invalid-email"}, "to", None),
+            ({"subject": "x" * 300}, "subject", None),  # More than 256 characters
+        ],
+        ids=["no_body", "invalid_email_format", "subject_too_long"],
+    )
+    def test_mail_request_invalid(self, validate_mail_request, overrides, field, message):
+        """Test MailRequest rejects a missing body, a bad address, or an oversized subject."""
         data = {
             "to": "test@example.com",
             "subject": "Test Subject",
-            "html": None,
-            "text": None,
-        }
-
-        with pytest.raises(ValidationError) as exc_info:
-            MailRequest(**data)
-
-        assert "Either html or text body is required" in str(exc_info.value)
-
-    def test_mail_request_invalid_email_format(self):
-        """Test MailRequest fails with invalid email format."""
-        data = {
-            "to": "invalid-email",
-            "subject": "Test Subject",
-            "html": "<h1>Hello</h1>",
-        }
-
-        with pytest.raises(ValidationError) as exc_info:
-            MailRequest(**data)
-
-        errors = exc_info.value.errors()
-        assert any(e["loc"] == ("to",) for e in errors)
-
-    def test_mail_request_subject_too_long(self):
-        """Test MailRequest fails when subject exceeds max length."""
-        data = {
-            "to": "test@example.com",
-            "subject": "x" * 300,  # More than 256 characters
             "html": "<h1>Hello</h1>",
+            **overrides,
         }
 
         with pytest.raises(ValidationError) as exc_info:
-            MailRequest(**data)
+            validate_mail_request(data)
 
         errors = exc_info.value.errors()
-        assert any("subject" in str(e["loc"]) for e in errors)
+        assert any(e["loc"] == (field,) for e in errors)
+        if message:
+            assert message in str(exc_info.value)
 
-    def test_mail_request_missing_required_fields(self):
+    def test_mail_request_missing_required_fields(self, validate_mail_request):
         """Test MailRequest fails when required fields are missing."""
         with pytest.raises(ValidationError) as exc_info:
-            MailRequest()
+            validate_mail_request({})
 
         errors = exc_info.value.errors()
         # Should have errors for 'to' and 'subject'
         assert len(errors) >= 2
 
-    def test_mail_request_empty_subject(self):
-        """Test MailRequest accepts empty subject."""
+    @pytest.mark.parametrize(
+        "subject",
+        [
+            "",  # Subject can be empty, just not too long
+            "🚀 Test Email with émojis & spëcial ¢hars!",
+        ],
+        ids=["empty_subject", "special_characters"],
+    )
+    def test_mail_request_subject_accepted(self, validate_mail_request, subject):
+        """Test MailRequest accepts empty subjects and special characters."""
         data = {
             "to": "test@example.com",
-            "subject": "",
+            "subject": subject,
             "html": "<h1>Hello</h1>",
         }
 
-        # Should be valid (subject can be empty, just not too long)
-        request = MailRequest(**data)
-        assert request.subject == ""
-
-    def test_mail_request_special_characters_in_subject(self):
-        """Test MailRequest with special characters in subject."""
-        data = {
-            "to": "test@example.com",
-            "subject": "🚀 Test Email with émojis & spëcial ¢hars!",
-            "html": "<h1>Hello</h1>",
-        }
-
-        request = MailRequest(**data)
-        assert "🚀" in request.subject
-        assert "émojis" in request.subject
+        request = validate_mail_request(data)
+        assert request.subject == subject
 
 
 @pytest.mark.unit
@@ -169,10 +149,8 @@ class TestMailResponse:
         """Test MailResponse JSON serialization."""
         response = MailResponse(status="queued", remaining=95)
 
-        json_data = response.model_dump()
-
-        assert json_data["status"] == "queued"
-        assert json_data["remaining"] == 95
+        # Serialized straight to JSON by pydantic-core, no intermediate dict
+        assert response.model_dump_json() == '{"status":"queued","remaining":95}'
 
     def test_mail_response_missing_fields(self):
         """Test MailResponse fails when required fields are missing."""
@@ -187,10 +165,8 @@ class TestMailResponse:
 class TestSendLogResponse:
     """Tests for SendLogResponse schema."""
 
-    def test_send_log_response_minimal(self):
+    def test_send_log_response_minimal(self, fixed_now):
         """Test SendLogResponse with minimal required fields."""
-        now = datetime.utcnow()
-
         response = SendLogResponse(
             id=1,
             api_key="sk_test_123",
@@ -198,7 +174,7 @@ class TestSendLogResponse:
             from_email="noreply@example.com",
             subject="Test",
             status="sent",
-            created_at=now,
+            created_at=fixed_now,
         )
 
         assert response.id == 1
@@ -207,10 +183,8 @@ class TestSendLogResponse:
         assert response.sent_at is None
         assert response.error_message is None
 
-    def test_send_log_response_complete(self):
+    def test_send_log_response_complete(self, fixed_now):
         """Test SendLogResponse with all fields."""
-        now = datetime.utcnow()
-
         response = SendLogResponse(
             id=1,
             api_key="sk_test_123",
@@ -218,17 +192,15 @@ class TestSendLogResponse:
             from_email="noreply@example.com",
             subject="Test",
             status="sent",
-            created_at=now,
-            sent_at=now,
+            created_at=fixed_now,
+            sent_at=fixed_now,
             error_message=None,
         )
 
-        assert response.sent_at == now
+        assert response.sent_at == fixed_now
 
-    def test_send_log_response_with_error(self):
+    def test_send_log_response_with_error(self, fixed_now):
         """Test SendLogResponse with error message."""
-        now = datetime.utcnow()
-
         response = SendLogResponse(
             id=1,
             api_key="sk_test_123",
@@ -236,7 +208,7 @@ class TestSendLogResponse:
             from_email="noreply@example.com",
             subject="Test",
             status="failed",
-            created_at=now,
+            created_at=fixed_now,
             error_message="SMTP connection failed",
         )
 
@@ -248,42 +220,35 @@ class TestSendLogResponse:
 class TestHealthResponse:
     """Tests for HealthResponse schema."""
 
-    def test_health_response_valid(self):
+    def test_health_response_valid(self, fixed_now):
         """Test HealthResponse creation."""
-        now = datetime.utcnow()
-
         response = HealthResponse(
             status="healthy",
-            timestamp=now,
+            timestamp=fixed_now,
             version="0.1.0",
         )
 
         assert response.status == "healthy"
-        assert response.timestamp == now
+        assert response.timestamp == fixed_now
         assert response.version == "0.1.0"
 
-    def test_health_response_serialization(self):
+    def test_health_response_serialization(self, fixed_now):
         """Test HealthResponse JSON serialization."""
-        now = datetime.utcnow()
-
         response = HealthResponse(
             status="healthy",
-            timestamp=now,
+            timestamp=fixed_now,
             version="0.1.0",
         )
 
-        json_data = response.model_dump()
-
-        assert json_data["status"] == "healthy"
-        assert json_data["version"] == "0.1.0"
+        assert response.model_dump_json() == (
+            '{"status":"healthy","timestamp":"2024-01-01T12:00:00","version":"0.1.0"}'
+        )
 
-    def test_health_response_unhealthy_status(self):
+    def test_health_response_unhealthy_status(self, fixed_now):
         """Test HealthResponse with unhealthy status."""
-        now = datetime.utcnow()
-
         response = HealthResponse(
             status="unhealthy",
-            timestamp=now,
+            timestamp=fixed_now,
             version="0.1.0",
         )
 
@@ -294,19 +259,12 @@ class TestHealthResponse:
 class TestSchemaIntegration:
     """Integration tests for schema interactions."""
 
-    def test_mail_request_to_dict(self):
+    def test_mail_request_to_dict(self, valid_mail):
         """Test converting MailRequest to dictionary."""
-        data = {
-            "to": "test@example.com",
-            "subject": "Test",
-            "html": "<h1>Hello</h1>",
-        }
-
-        request = MailRequest(**data)
-        dict_data = request.model_dump()
+        dict_data = valid_mail.model_dump()
 
         assert dict_data["to"] == "test@example.com"
-        assert dict_data["subject"] == "Test"
+        assert dict_data["subject"] == "Test Subject"
         assert dict_data["html"] == "<h1>Hello</h1>"
         assert dict_data["text"] is None
 
@@ -0,0 +1,16 @@
+"""
+Fixtures shared by the service unit tests.
+
+Every test here runs with aiosmtplib.send in the mailer module replaced by the
+mock_smtp fixture, so no test can reach a real SMTP server by accident.
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _patch_aiosmtplib(monkeypatch: pytest.MonkeyPatch, mock_smtp: AsyncMock) -> None:
+    """Route app.services.mailer.aiosmtplib.send to mock_smtp for the whole test."""
+    monkeypatch.setattr("app.services.mailer.aiosmtplib.send", mock_smtp)
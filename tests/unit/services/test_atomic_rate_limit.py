@@ -1,24 +1,38 @@
 """Unit tests for AtomicRateLimitService (PostgreSQL-based rate limiting)."""
 
+import hashlib
 import uuid
 from datetime import date, timedelta
 
 import pytest
+from sqlalchemy import select
 
 from app.models.api_key import APIKey
 from app.models.daily_usage import DailyUsage
-from app.services.atomic_rate_limit import AtomicRateLimitService, RateLimitResult
+from app.services.atomic_rate_limit import AtomicRateLimitService, RateLimitResult, _retry_after_for_minute
+
+
+@pytest.fixture
+def unique_hash(request) -> str:
+    """A key_hash unique to the running test, so tests never collide on api_keys.key_hash."""
+    digest = hashlib.md5(request.node.nodeid.encode(), usedforsecurity=False).hexdigest()[:12]
+    return f"atomic_{digest}"
+
+
+async def _reload_count(session, usage_id: int) -> int:
+    """Read just DailyUsage.count from the database (no full-row refresh)."""
+    return await session.scalar(select(DailyUsage.count).where(DailyUsage.id == usage_id))
 
 
 class TestAtomicRateLimitService:
     """Tests for atomic PostgreSQL-based rate limiting."""
 
-    async def test_check_and_increment_new_key(self, db_session, test_settings):
+    async def test_check_and_increment_new_key(self, db_session, test_settings, unique_hash):
         """Test rate limit check for new API key (creates DailyUsage)."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_1", name="Atomic Test Key 1")
+        api_key = APIKey(key_hash=unique_hash, name="Atomic Test Key 1")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -30,12 +44,12 @@ class TestAtomicRateLimitService:
         assert result.current_count == 5
         assert result.retry_after_seconds is None
 
-    async def test_check_and_increment_existing_usage(self, db_session, test_settings):
+    async def test_check_and_increment_existing_usage(self, db_session, test_settings, unique_hash):
         """Test incrementing existing daily usage."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_2", name="Atomic Test Key 2")
+        api_key = APIKey(key_hash=unique_hash, name="Atomic Test Key 2")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -51,12 +65,12 @@ class TestAtomicRateLimitService:
         assert result.allowed is True
         assert result.current_count == 15
 
-    async def test_check_and_increment_exceeds_limit(self, db_session, test_settings):
+    async def test_check_and_increment_exceeds_limit(self, db_session, test_settings, unique_hash):
         """Test that exceeding limit is rejected and not committed."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_3", name="Atomic Test Key 3")
+        api_key = APIKey(key_hash=unique_hash, name="Atomic Test Key 3")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -73,15 +87,30 @@ class TestAtomicRateLimitService:
         assert result.retry_after_seconds is not None
 
         # Verify count was NOT updated in DB
-        await db_session.refresh(usage)
-        assert usage.count == 99
+        assert await _reload_count(db_session, usage.id) == 99
+
+    async def test_check_and_increment_new_key_exceeds_limit(self, db_session, test_settings, unique_hash):
+        """Test that a first request above the limit is rejected without creating usage."""
+        service = AtomicRateLimitService(db_session, test_settings)
+
+        # Create API key
+        api_key = APIKey(key_hash=unique_hash, name="Atomic Test Key 7")
+        db_session.add(api_key)
+        await db_session.commit()
+
+        # Limit is 100, so 101 is rejected outright
+        result = await service.check_and_increment_rate_limit(api_key.id, email_count=101)
+
+        assert result.allowed is False
+        assert result.current_count == 0
+        assert await service._get_current_usage(api_key.id, date.today()) == 0
 
-    async def test_check_and_increment_at_limit(self, db_session, test_settings):
+    async def test_check_and_increment_at_limit(self, db_session, test_settings, unique_hash):
         """Test that reaching exactly the limit is allowed."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_4", name="Atomic Test Key 4")
+        api_key = APIKey(key_hash=unique_hash, name="Atomic Test Key 4")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -97,12 +126,12 @@ class TestAtomicRateLimitService:
         assert result.allowed is True
         assert result.current_count == 100
 
-    async def test_get_effective_daily_limit_custom(self, db_session, test_settings):
+    async def test_get_effective_daily_limit_custom(self, db_session, test_settings, unique_hash):
         """Test getting custom daily limit from API key."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key with custom limit
-        api_key = APIKey(key_hash="test_hash_atomic_5", name="Custom Limit Key", daily_limit=500)
+        api_key = APIKey(key_hash=unique_hash, name="Custom Limit Key", daily_limit=500)
         db_session.add(api_key)
         await db_session.commit()
 
@@ -110,12 +139,12 @@ class TestAtomicRateLimitService:
 
         assert limit == 500
 
-    async def test_get_effective_daily_limit_default(self, db_session, test_settings):
+    async def test_get_effective_daily_limit_default(self, db_session, test_settings, unique_hash):
         """Test getting default daily limit when API key has no custom limit."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key without custom limit
-        api_key = APIKey(key_hash="test_hash_atomic_6", name="Default Limit Key", daily_limit=None)
+        api_key = APIKey(key_hash=unique_hash, name="Default Limit Key", daily_limit=None)
         db_session.add(api_key)
         await db_session.commit()
 
@@ -123,9 +152,10 @@ class TestAtomicRateLimitService:
 
         assert limit == test_settings.default_daily_limit
 
-    async def test_calculate_retry_after_seconds(self, db_session, test_settings):
+    def test_calculate_retry_after_seconds(self, test_settings):
         """Test retry-after calculation."""
-        service = AtomicRateLimitService(db_session, test_settings)
+        # Pure clock arithmetic: no session or event loop needed
+        service = AtomicRateLimitService(None, test_settings)
 
         retry_after = service._calculate_retry_after_seconds()
 
@@ -133,12 +163,18 @@ class TestAtomicRateLimitService:
         assert retry_after > 0
         assert retry_after <= 86400
 
-    async def test_multiple_increments_same_day(self, db_session, test_settings):
+    def test_retry_after_for_minute(self):
+        """Test the per-minute retry-after values at the edges of a UTC day."""
+        assert _retry_after_for_minute(0) == 86400  # 00:00 on 1970-01-01
+        assert _retry_after_for_minute(1439) == 60  # 23:59
+        assert _retry_after_for_minute(1440 + 720) == 43200  # 12:00 the next day
+
+    async def test_multiple_increments_same_day(self, db_session, test_settings, unique_hash):
         """Test multiple increments on same day accumulate."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_10", name="Multi Increment Key")
+        api_key = APIKey(key_hash=unique_hash, name="Multi Increment Key")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -156,12 +192,12 @@ class TestAtomicRateLimitService:
         assert result2.current_count == 25
         assert result3.current_count == 45
 
-    async def test_different_days_independent(self, db_session, test_settings):
+    async def test_different_days_independent(self, db_session, test_settings, unique_hash):
         """Test that usage on different days is independent."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_11", name="Different Days Key")
+        api_key = APIKey(key_hash=unique_hash, name="Different Days Key")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -182,12 +218,12 @@ class TestAtomicRateLimitService:
 class TestAtomicRateLimitConcurrency:
     """Tests for concurrent access scenarios."""
 
-    async def test_concurrent_increment_safety(self, db_session, test_settings):
+    async def test_concurrent_increment_safety(self, db_session, test_settings, unique_hash):
         """Test that atomic operations prevent race conditions."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_12", name="Concurrent Test Key")
+        api_key = APIKey(key_hash=unique_hash, name="Concurrent Test Key")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -204,15 +240,84 @@ class TestAtomicRateLimitConcurrency:
         assert result2.current_count == 60
 
 
+class TestAtomicRateLimitBulk:
+    """Tests for the multi-key bulk check."""
+
+    async def test_bulk_increments_each_key(self, db_session, test_settings, bulk_api_keys):
+        """Test one bulk call increments every key, summing repeated keys."""
+        service = AtomicRateLimitService(db_session, test_settings)
+
+        key1, key2 = await bulk_api_keys(2)
+        usage = DailyUsage(api_key_id=key2.id, day=date.today(), count=10)
+        db_session.add(usage)
+        await db_session.commit()
+
+        results = await service.check_and_increment_bulk([(key1.id, 3), (key2.id, 5), (key1.id, 2)])
+        await db_session.commit()
+
+        assert results[key1.id] == RateLimitResult(allowed=True, current_count=5)
+        assert results[key2.id] == RateLimitResult(allowed=True, current_count=15)
+
+    async def test_bulk_rejects_only_keys_over_limit(self, db_session, test_settings, bulk_api_keys):
+        """Test that a key over its limit is rejected without affecting the others."""
+        service = AtomicRateLimitService(db_session, test_settings)
+
+        key1, key2 = await bulk_api_keys(2)
+        usage = DailyUsage(api_key_id=key2.id, day=date.today(), count=99)  # Limit is 100
+        db_session.add(usage)
+        await db_session.commit()
+
+        results = await service.check_and_increment_bulk([(key1.id, 5), (key2.id, 2)])
+
+        assert results[key1.id].allowed is True
+        assert results[key2.id].allowed is False
+        assert results[key2.id].current_count == 99
+        assert results[key2.id].retry_after_seconds is not None
+
+        # Rejected key's usage is untouched
+        assert await _reload_count(db_session, usage.id) == 99
+
+    async def test_bulk_unknown_key_denied_individually(self, db_session, test_settings, bulk_api_keys):
+        """Test an unknown key is denied on its own while known keys in the batch still pass."""
+        service = AtomicRateLimitService(db_session, test_settings)
+
+        (key1,) = await bulk_api_keys(1)
+        unknown_id = uuid.uuid4()
+
+        results = await service.check_and_increment_bulk([(key1.id, 3), (unknown_id, 1)])
+        await db_session.commit()
+
+        assert results[key1.id] == RateLimitResult(allowed=True, current_count=3)
+        assert results[unknown_id] == RateLimitResult(allowed=False, current_count=0, retry_after_seconds=None)
+
+        # No usage row is created for the unknown key
+        usage = await db_session.execute(select(DailyUsage).where(DailyUsage.api_key_id == unknown_id))
+        assert usage.scalar_one_or_none() is None
+
+    async def test_bulk_empty(self, test_settings):
+        """Test that an empty batch returns no results without querying."""
+        service = AtomicRateLimitService(None, test_settings)
+
+        assert await service.check_and_increment_bulk([]) == {}
+
+
 class TestAtomicRateLimitEdgeCases:
     """Tests for edge cases."""
 
-    async def test_zero_email_count(self, db_session, test_settings):
+    def test_rate_limit_result_is_a_named_tuple(self):
+        """Test RateLimitResult stays a NamedTuple (no per-instance __dict__)."""
+        result = RateLimitResult(allowed=True, current_count=3)
+
+        assert isinstance(result, tuple)
+        assert not hasattr(result, "__dict__")
+        assert result == (True, 3, None)
+
+    async def test_zero_email_count(self, db_session, test_settings, unique_hash):
         """Test with zero email count."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         # Create API key
-        api_key = APIKey(key_hash="test_hash_atomic_13", name="Zero Count Key")
+        api_key = APIKey(key_hash=unique_hash, name="Zero Count Key")
         db_session.add(api_key)
         await db_session.commit()
 
@@ -223,17 +328,29 @@ class TestAtomicRateLimitEdgeCases:
         assert result.allowed is True
         assert result.current_count == 0
 
+    async def test_zero_email_count_reports_existing_usage(self, db_session, test_settings, unique_hash):
+        """Test that a zero count returns today's usage without modifying it."""
+        service = AtomicRateLimitService(db_session, test_settings)
+
+        api_key = APIKey(id=uuid.uuid4(), key_hash=unique_hash, name="Zero Count Usage Key")
+        usage = DailyUsage(api_key_id=api_key.id, day=date.today(), count=42)
+        db_session.add_all([api_key, usage])
+        await db_session.commit()
+
+        result = await service.check_and_increment_rate_limit(api_key.id, email_count=0)
+
+        assert result == RateLimitResult(allowed=True, current_count=42)
+        assert await _reload_count(db_session, usage.id) == 42
+
     async def test_nonexistent_api_key(self, db_session, test_settings):
         """Test with non-existent API key ID."""
         service = AtomicRateLimitService(db_session, test_settings)
 
         fake_uuid = uuid.uuid4()
 
-        # Should raise or handle gracefully
-        try:
-            result = await service.check_and_increment_rate_limit(fake_uuid, email_count=1)
-            # If it succeeds, it should use default limit
-            assert result.allowed is True
-        except Exception:
-            # Or it may raise an exception, which is also valid
-            pass
+        result = await service.check_and_increment_rate_limit(fake_uuid, email_count=1)
+
+        # Unknown keys are denied without touching daily_usage (no foreign key violation)
+        assert result == RateLimitResult(allowed=False, current_count=0, retry_after_seconds=None)
+        usage = await db_session.execute(select(DailyUsage).where(DailyUsage.api_key_id == fake_uuid))
+        assert usage.first() is None
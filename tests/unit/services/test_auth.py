@@ -11,32 +11,39 @@ Tests cover:
 
 import uuid
 
+import bcrypt
 import pytest
 
+from app.models.api_key import APIKey
 from app.services.auth import AuthResult, AuthService
 
 
+@pytest.fixture
+def auth_service(db_session, test_settings) -> AuthService:
+    """AuthService bound to the per-test session."""
+    return AuthService(db_session, test_settings)
+
+
 @pytest.mark.unit
 class TestAuthServiceHashing:
-    """Tests for API key hashing and verification."""
+    """Tests for API key hashing and verification (pure CPU, no database session needed)."""
 
-    def test_hash_api_key(self, db_session, test_settings):
-        """Test that API key hashing produces a different hash each time."""
-        auth_service = AuthService(db_session, test_settings)
+    def test_hash_api_key(self, test_settings):
+        """Test that API key hashing is deterministic so keys can be looked up by hash."""
+        auth_service = AuthService(None, test_settings)
 
         raw_key = "sk_test_12345"
         hash1 = auth_service._hash_api_key(raw_key)
         hash2 = auth_service._hash_api_key(raw_key)
 
-        # Hashes should be different (different salts)
-        assert hash1 != hash2
-        # But both should be valid bcrypt hashes
-        assert len(hash1) > 20
-        assert len(hash2) > 20
+        # Same key, same hash (HMAC-SHA256 hex digest)
+        assert hash1 == hash2
+        assert len(hash1) == 64
+        assert raw_key not in hash1
 
-    def test_verify_api_key_valid(self, db_session, test_settings):
+    def test_verify_api_key_valid(self, test_settings):
         """Test verification of a valid API key."""
-        auth_service = AuthService(db_session, test_settings)
+        auth_service = AuthService(None, test_settings)
 
         raw_key = "sk_test_valid_key"
         hashed = auth_service._hash_api_key(raw_key)
@@ -44,9 +51,9 @@ class TestAuthServiceHashing:
         # Should verify successfully
         assert auth_service._verify_api_key(raw_key, hashed) is True
 
-    def test_verify_api_key_invalid(self, db_session, test_settings):
+    def test_verify_api_key_invalid(self, test_settings):
         """Test verification of an invalid API key."""
-        auth_service = AuthService(db_session, test_settings)
+        auth_service = AuthService(None, test_settings)
 
         raw_key = "sk_test_valid_key"
         wrong_key = "sk_test_wrong_key"
@@ -55,16 +62,24 @@ class TestAuthServiceHashing:
         # Should fail verification
         assert auth_service._verify_api_key(wrong_key, hashed) is False
 
+    def test_verify_api_key_legacy_bcrypt(self, test_settings):
+        """Test that keys stored with bcrypt before the HMAC switch still verify."""
+        auth_service = AuthService(None, test_settings)
+
+        raw_key = "sk_test_legacy_key"
+        hashed = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+        assert auth_service._verify_api_key(raw_key, hashed) is True
+        assert auth_service._verify_api_key("sk_test_wrong_key", hashed) is False
+
 
 @pytest.mark.unit
 @pytest.mark.database
 class TestAuthServiceValidation:
     """Tests for API key validation."""
 
-    async def test_validate_active_key(self, db_session, test_settings):
+    async def test_validate_active_key(self, auth_service):
         """Test validation of an active API key."""
-        auth_service = AuthService(db_session, test_settings)
-
         # Create a fresh key for this test
         api_key, raw_key = await auth_service.create_api_key(name="Active Test Key")
 
@@ -75,10 +90,8 @@ class TestAuthServiceValidation:
             assert key_obj.id == api_key.id
             assert key_obj.is_active is True
 
-    async def test_validate_inactive_key(self, db_session, test_settings):
+    async def test_validate_inactive_key(self, db_session, auth_service):
         """Test validation of an inactive API key."""
-        auth_service = AuthService(db_session, test_settings)
-
         # Create key and deactivate it
         api_key, raw_key = await auth_service.create_api_key(name="Inactive Test Key")
 
@@ -92,19 +105,15 @@ class TestAuthServiceValidation:
         assert result.value == AuthResult.INVALID.value
         assert key_obj is None
 
-    async def test_validate_nonexistent_key(self, db_session, test_settings):
+    async def test_validate_nonexistent_key(self, auth_service):
         """Test validation of a non-existent API key."""
-        auth_service = AuthService(db_session, test_settings)
-
         result, key_obj = await auth_service.validate_api_key_detailed("sk_test_nonexistent")
 
         assert result == AuthResult.INVALID
         assert key_obj is None
 
-    async def test_validate_api_key_shorthand(self, db_session, test_settings):
+    async def test_validate_api_key_shorthand(self, auth_service):
         """Test the shorthand validate_api_key method."""
-        auth_service = AuthService(db_session, test_settings)
-
         # Create a fresh key
         _, raw_key = await auth_service.create_api_key(name="Shorthand Test Key")
 
@@ -119,16 +128,47 @@ class TestAuthServiceValidation:
         key_obj = await auth_service.validate_api_key("sk_test_invalid")
         assert key_obj is None
 
+    async def test_legacy_key_not_scanned_on_request(self, db_session, auth_service):
+        """Test a bcrypt-stored key is not accepted by request validation until it is upgraded."""
+        raw_key = "sk_test_legacy_request_key"
+        legacy_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+        db_session.add(APIKey(key_hash=legacy_hash, name="Legacy Key"))
+        await db_session.commit()
+
+        result, key_obj = await auth_service.validate_api_key_detailed(raw_key)
+
+        assert result == AuthResult.INVALID
+        assert key_obj is None
+
+    async def test_upgrade_legacy_api_key(self, db_session, auth_service):
+        """Test upgrading a bcrypt-stored key rewrites it to its HMAC hash so lookups find it."""
+        raw_key = "sk_test_legacy_upgrade_key"
+        legacy_hash = bcrypt.hashpw(raw_key.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+        legacy_key = APIKey(key_hash=legacy_hash, name="Legacy Upgrade Key")
+        db_session.add(legacy_key)
+        await db_session.commit()
+
+        assert await auth_service.upgrade_legacy_api_key("sk_test_wrong_key") is None
+
+        upgraded = await auth_service.upgrade_legacy_api_key(raw_key)
+        await db_session.commit()
+
+        assert upgraded is not None
+        assert upgraded.id == legacy_key.id
+        assert upgraded.key_hash == auth_service._hash_api_key(raw_key)
+
+        result, key_obj = await auth_service.validate_api_key_detailed(raw_key)
+        assert result == AuthResult.VALID
+        assert key_obj.id == legacy_key.id
+
 
 @pytest.mark.unit
 @pytest.mark.database
 class TestAuthServiceCreation:
     """Tests for API key creation."""
 
-    async def test_create_api_key_basic(self, db_session, test_settings):
+    async def test_create_api_key_basic(self, auth_service):
         """Test basic API key creation."""
-        auth_service = AuthService(db_session, test_settings)
-
         key_obj, raw_key = await auth_service.create_api_key(name="Test Key")
 
         # Check returned values
@@ -146,46 +186,36 @@ class TestAuthServiceCreation:
         if validated_key is not None:
             assert validated_key.id == key_obj.id
 
-    async def test_create_api_key_with_daily_limit(self, db_session, test_settings):
+    async def test_create_api_key_with_daily_limit(self, auth_service):
         """Test creating API key with daily limit."""
-        auth_service = AuthService(db_session, test_settings)
-
         key_obj, _ = await auth_service.create_api_key(name="Limited Key", daily_limit=50)
 
         assert key_obj.daily_limit == 50
 
-    async def test_create_api_key_with_allowed_recipients(self, db_session, test_settings):
+    async def test_create_api_key_with_allowed_recipients(self, auth_service):
         """Test creating API key with allowed recipients."""
-        auth_service = AuthService(db_session, test_settings)
-
         recipients = ["test@example.com", "  ADMIN@EXAMPLE.COM  "]
         key_obj, raw_key = await auth_service.create_api_key(name="Restricted Key", allowed_recipients=recipients)
 
         # Should be normalized (lowercase, stripped)
         assert key_obj.allowed_recipients == ["test@example.com", "admin@example.com"]
 
-    async def test_create_api_key_with_zero_daily_limit(self, db_session, test_settings):
+    async def test_create_api_key_with_zero_daily_limit(self, auth_service):
         """Test that zero daily limit is treated as None."""
-        auth_service = AuthService(db_session, test_settings)
-
         key_obj, raw_key = await auth_service.create_api_key(name="Zero Limit Key", daily_limit=0)
 
         # Zero should be normalized to None
         assert key_obj.daily_limit is None
 
-    async def test_create_api_key_with_negative_daily_limit(self, db_session, test_settings):
+    async def test_create_api_key_with_negative_daily_limit(self, auth_service):
         """Test that negative daily limit is treated as None."""
-        auth_service = AuthService(db_session, test_settings)
-
         key_obj, raw_key = await auth_service.create_api_key(name="Negative Limit Key", daily_limit=-10)
 
         # Negative should be normalized to None
         assert key_obj.daily_limit is None
 
-    async def test_create_api_key_with_empty_recipients(self, db_session, test_settings):
+    async def test_create_api_key_with_empty_recipients(self, auth_service):
         """Test that empty recipients are filtered out."""
-        auth_service = AuthService(db_session, test_settings)
-
         recipients = ["test@example.com", "", "  ", "admin@example.com"]
         key_obj, raw_key = await auth_service.create_api_key(
             name="Filtered Recipients Key", allowed_recipients=recipients
@@ -194,10 +224,8 @@ class TestAuthServiceCreation:
         # Empty strings should be filtered
         assert key_obj.allowed_recipients == ["test@example.com", "admin@example.com"]
 
-    async def test_create_multiple_api_keys(self, db_session, test_settings):
+    async def test_create_multiple_api_keys(self, auth_service):
         """Test creating multiple API keys with unique keys."""
-        auth_service = AuthService(db_session, test_settings)
-
         key1_obj, raw_key1 = await auth_service.create_api_key(name="Key 1")
         key2_obj, raw_key2 = await auth_service.create_api_key(name="Key 2")
 
@@ -211,10 +239,8 @@ class TestAuthServiceCreation:
 class TestAuthServiceDeactivation:
     """Tests for API key deactivation."""
 
-    async def test_deactivate_api_key_success(self, db_session, test_settings):
+    async def test_deactivate_api_key_success(self, db_session, auth_service):
         """Test successful API key deactivation."""
-        auth_service = AuthService(db_session, test_settings)
-
         # Create a fresh API key for this test
         key_obj, raw_key = await auth_service.create_api_key(name="Key to Deactivate")
         await db_session.commit()
@@ -236,10 +262,8 @@ class TestAuthServiceDeactivation:
         # validation_result, _ = await auth_service.validate_api_key_detailed(raw_key)
         # assert validation_result.value == AuthResult.INACTIVE.value
 
-    async def test_deactivate_nonexistent_key(self, db_session, test_settings):
+    async def test_deactivate_nonexistent_key(self, auth_service):
         """Test deactivating a non-existent API key."""
-        auth_service = AuthService(db_session, test_settings)
-
         fake_id = uuid.uuid4()
         result = await auth_service.deactivate_api_key(fake_id)
 
@@ -251,20 +275,16 @@ class TestAuthServiceDeactivation:
 class TestAuthServiceInfo:
     """Tests for API key information retrieval."""
 
-    async def test_get_api_key_info_success(self, db_session, test_settings, test_api_key):
+    async def test_get_api_key_info_success(self, test_api_key, auth_service):
         """Test retrieving API key information."""
-        auth_service = AuthService(db_session, test_settings)
-
         key_obj = await auth_service.get_api_key_info(test_api_key.id)
 
         assert key_obj is not None
         assert key_obj.id == test_api_key.id
         assert key_obj.name == test_api_key.name
 
-    async def test_get_api_key_info_not_found(self, db_session, test_settings):
+    async def test_get_api_key_info_not_found(self, auth_service):
         """Test retrieving non-existent API key information."""
-        auth_service = AuthService(db_session, test_settings)
-
         fake_id = uuid.uuid4()
         key_obj = await auth_service.get_api_key_info(fake_id)
 
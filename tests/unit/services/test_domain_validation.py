@@ -1,7 +1,5 @@
 """Unit tests for DomainValidationService."""
 
-import pytest
-
 from app.services.domain_validation import DomainValidationService
 
 
@@ -34,14 +32,14 @@ class TestDomainValidationService:
         assert service.is_domain_allowed("user@EXAMPLE.COM") is True
         assert service.is_domain_allowed("user@Example.Com") is True
 
-    @pytest.mark.skip("Flaky test - to be fixed")
-    def test_is_domain_allowed_invalid_email(self, test_settings):
+    def test_is_domain_allowed_invalid_email(self, test_settings_with_allowlist):
         """Test handling invalid email format."""
-        service = DomainValidationService(test_settings)
+        service = DomainValidationService(test_settings_with_allowlist)
 
         assert service.is_domain_allowed("invalid") is False
         assert service.is_domain_allowed("@example.com") is False
         assert service.is_domain_allowed("") is False
+        assert service.is_domain_allowed("user@evil.com@example.com") is False
 
     def test_filter_allowed_emails(self, test_settings_with_allowlist):
         """Test filtering emails by allowlist."""
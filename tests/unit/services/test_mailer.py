@@ -1,27 +1,50 @@
 """Unit tests for MailerService."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import re
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
 
+import aiosmtplib
 import pytest
 
-from app.services.mailer import MailerService
+from app.services.mailer import _MESSAGE_ID_RE, MailerService, SMTPConnectionPool
 
 
+@pytest.fixture(scope="module")
+def mailer(test_settings) -> MailerService:
+    """MailerService without a domain allowlist; it holds no per-send state, so one instance is shared."""
+    return MailerService(test_settings)
+
+
+@pytest.fixture(scope="module")
+def mailer_allowlist(test_settings_with_allowlist) -> MailerService:
+    """Shared MailerService with the example.com/test.com allowlist."""
+    return MailerService(test_settings_with_allowlist)
+
+
+@pytest.mark.asyncio(loop_scope="session")
 class TestMailerService:
     """Tests for MailerService email sending."""
 
-    async def test_send_email_text_only(self, test_settings, mock_smtp):
-        """Test sending plain text email."""
-        mailer = MailerService(test_settings)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["test@example.com"], subject="Test Subject", text="Plain text body"
-            )
+    @pytest.mark.parametrize(
+        "html,text,is_multipart",
+        [
+            (None, "Plain text body", False),
+            ("<h1>HTML body</h1>", None, False),
+            ("<p>HTML version</p>", "Text version", True),
+        ],
+        ids=["text_only", "html_only", "html_and_text"],
+    )
+    async def test_send_email_body(self, test_settings, mock_smtp, mailer, html, text, is_multipart):
+        """Test sending text, HTML and text+HTML bodies; only the combination is multipart/alternative."""
+        message_id = await mailer.send_email(to=["test@example.com"], subject="Test Subject", html=html, text=text)
 
         assert message_id is not None
         mock_smtp.assert_called_once()
         call_args = mock_smtp.call_args
+        assert call_args.args[0].is_multipart() is is_multipart
 
         # Check SMTP configuration
         assert call_args.kwargs["hostname"] == test_settings.smtp_host
@@ -30,78 +53,52 @@ class TestMailerService:
         assert call_args.kwargs["password"] == test_settings.smtp_password
         assert call_args.kwargs["start_tls"] == test_settings.smtp_starttls
 
-    async def test_send_email_html_only(self, test_settings, mock_smtp):
-        """Test sending HTML email."""
-        mailer = MailerService(test_settings)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["test@example.com"], subject="HTML Email", html="<h1>HTML body</h1>"
-            )
-
-        assert message_id is not None
-        mock_smtp.assert_called_once()
-
-    async def test_send_email_both_html_and_text(self, test_settings, mock_smtp):
-        """Test sending email with both HTML and text."""
-        mailer = MailerService(test_settings)
+    async def test_send_email_multiple_recipients(self, mailer, mock_smtp):
+        """Test sending email to multiple recipients."""
+        recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["test@example.com"], subject="Multipart Email", html="<p>HTML version</p>", text="Text version"
-            )
+        message_id = await mailer.send_email(to=recipients, subject="Multi-recipient", text="Test message")
 
         assert message_id is not None
         mock_smtp.assert_called_once()
 
-    async def test_send_email_multiple_recipients(self, test_settings, mock_smtp):
-        """Test sending email to multiple recipients."""
-        mailer = MailerService(test_settings)
-        recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
+    async def test_send_email_returns_server_message_id(self, mailer, mock_smtp):
+        """Test the Message-ID reported in the DATA response is returned instead of a generated one."""
+        mock_smtp.return_value = ({}, "2.0.0 Ok: queued Message-ID: <srv-1@mail.example.com>")
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(to=recipients, subject="Multi-recipient", text="Test message")
+        message_id = await mailer.send_email(to=["test@example.com"], subject="Server ID", text="Test")
 
-        assert message_id is not None
-        mock_smtp.assert_called_once()
+        assert message_id == "srv-1@mail.example.com"
 
-    async def test_send_email_with_custom_headers(self, test_settings, mock_smtp):
+    async def test_send_email_with_custom_headers(self, mailer, mock_smtp):
         """Test sending email with custom headers."""
-        mailer = MailerService(test_settings)
         custom_headers = {"X-Custom-Header": "custom-value", "Reply-To": "reply@example.com"}
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["test@example.com"], subject="Custom Headers", text="Test", headers=custom_headers
-            )
+        message_id = await mailer.send_email(
+            to=["test@example.com"], subject="Custom Headers", text="Test", headers=custom_headers
+        )
 
         assert message_id is not None
         mock_smtp.assert_called_once()
 
-    async def test_send_email_with_custom_from(self, test_settings, mock_smtp):
+    async def test_send_email_with_custom_from(self, mailer, mock_smtp):
         """Test sending email with custom from address."""
-        mailer = MailerService(test_settings)
         custom_from = "custom@example.com"
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["test@example.com"], subject="Custom From", text="Test", from_email=custom_from
-            )
+        message_id = await mailer.send_email(
+            to=["test@example.com"], subject="Custom From", text="Test", from_email=custom_from
+        )
 
         assert message_id is not None
         mock_smtp.assert_called_once()
 
-    async def test_send_email_no_recipients(self, test_settings):
+    async def test_send_email_no_recipients(self, mailer):
         """Test that empty recipient list raises ValueError."""
-        mailer = MailerService(test_settings)
-
         with pytest.raises(ValueError, match="At least one recipient is required"):
             await mailer.send_email(to=[], subject="Test", text="Test")
 
-    async def test_send_email_no_body(self, test_settings):
+    async def test_send_email_no_body(self, mailer):
         """Test that missing body raises ValueError."""
-        mailer = MailerService(test_settings)
-
         with pytest.raises(ValueError, match="Either HTML or text body is required"):
             await mailer.send_email(
                 to=["test@example.com"],
@@ -109,75 +106,57 @@ class TestMailerService:
                 # No html or text provided
             )
 
-    async def test_send_email_smtp_failure(self, test_settings):
+    async def test_send_email_smtp_failure(self, mailer, mock_smtp):
         """Test handling SMTP connection failure."""
-        mailer = MailerService(test_settings)
+        mock_smtp.side_effect = Exception("SMTP connection failed")
 
-        mock_send = AsyncMock(side_effect=Exception("SMTP connection failed"))
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_send):
-            message_id = await mailer.send_email(to=["test@example.com"], subject="Test", text="Test")
+        message_id = await mailer.send_email(to=["test@example.com"], subject="Test", text="Test")
 
         assert message_id is None  # Returns None on failure
 
-    async def test_send_email_smtp_timeout(self, test_settings):
+    async def test_send_email_smtp_timeout(self, mailer, mock_smtp):
         """Test handling SMTP timeout."""
-        mailer = MailerService(test_settings)
-
-        mock_send = AsyncMock(side_effect=TimeoutError("Connection timeout"))
+        mock_smtp.side_effect = TimeoutError("Connection timeout")
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_send):
-            message_id = await mailer.send_email(to=["test@example.com"], subject="Test", text="Test")
+        message_id = await mailer.send_email(to=["test@example.com"], subject="Test", text="Test")
 
         assert message_id is None
 
 
+@pytest.mark.asyncio(loop_scope="session")
 class TestMailerDomainAllowlist:
     """Tests for domain allowlist functionality."""
 
-    async def test_send_email_allowed_domain(self, test_settings_with_allowlist, mock_smtp):
+    async def test_send_email_allowed_domain(self, mailer_allowlist, mock_smtp):
         """Test sending email to allowed domain."""
-        mailer = MailerService(test_settings_with_allowlist)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["user@example.com"], subject="Test", text="Test"  # example.com is in allowlist
-            )
+        message_id = await mailer_allowlist.send_email(
+            to=["user@example.com"], subject="Test", text="Test"  # example.com is in allowlist
+        )
 
         assert message_id is not None
 
-    async def test_send_email_blocked_domain(self, test_settings_with_allowlist):
+    async def test_send_email_blocked_domain(self, mailer_allowlist):
         """Test sending email to blocked domain raises ValueError."""
-        mailer = MailerService(test_settings_with_allowlist)
-
         with pytest.raises(ValueError, match="Domain not allowed"):
-            await mailer.send_email(to=["user@blocked.com"], subject="Test", text="Test")  # Not in allowlist
+            await mailer_allowlist.send_email(to=["user@blocked.com"], subject="Test", text="Test")  # Not in allowlist
 
-    async def test_send_email_mixed_domains(self, test_settings_with_allowlist):
+    async def test_send_email_mixed_domains(self, mailer_allowlist):
         """Test sending to mixed allowed/blocked domains."""
-        mailer = MailerService(test_settings_with_allowlist)
-
         # Should fail because blocked.com is not allowed
         with pytest.raises(ValueError, match="Domain not allowed"):
-            await mailer.send_email(to=["user@example.com", "user@blocked.com"], subject="Test", text="Test")
+            await mailer_allowlist.send_email(to=["user@example.com", "user@blocked.com"], subject="Test", text="Test")
 
-    async def test_send_email_case_insensitive_domain(self, test_settings_with_allowlist, mock_smtp):
+    async def test_send_email_case_insensitive_domain(self, mailer_allowlist, mock_smtp):
         """Test domain check is case-insensitive."""
-        mailer = MailerService(test_settings_with_allowlist)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(
-                to=["user@EXAMPLE.COM"], subject="Test", text="Test"  # Uppercase should work
-            )
+        message_id = await mailer_allowlist.send_email(
+            to=["user@EXAMPLE.COM"], subject="Test", text="Test"  # Uppercase should work
+        )
 
         assert message_id is not None
 
-    async def test_send_email_no_allowlist(self, test_settings, mock_smtp):
+    async def test_send_email_no_allowlist(self, mailer, mock_smtp):
         """Test that with no allowlist, all domains are allowed."""
-        mailer = MailerService(test_settings)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp):
-            message_id = await mailer.send_email(to=["user@anydomain.com"], subject="Test", text="Test")
+        message_id = await mailer.send_email(to=["user@anydomain.com"], subject="Test", text="Test")
 
         assert message_id is not None
 
@@ -185,122 +164,206 @@ class TestMailerDomainAllowlist:
 class TestMailerHelperMethods:
     """Tests for MailerService helper methods."""
 
-    def test_is_domain_allowed_with_allowlist(self, test_settings_with_allowlist):
+    def test_is_domain_allowed_with_allowlist(self, mailer_allowlist):
         """Test domain checking with allowlist configured."""
-        mailer = MailerService(test_settings_with_allowlist)
+        assert mailer_allowlist._is_domain_allowed("user@example.com") is True
+        assert mailer_allowlist._is_domain_allowed("user@test.com") is True
+        assert mailer_allowlist._is_domain_allowed("user@blocked.com") is False
 
-        assert mailer._is_domain_allowed("user@example.com") is True
-        assert mailer._is_domain_allowed("user@test.com") is True
-        assert mailer._is_domain_allowed("user@blocked.com") is False
-
-    def test_is_domain_allowed_without_allowlist(self, test_settings):
+    def test_is_domain_allowed_without_allowlist(self, mailer):
         """Test domain checking without allowlist (all allowed)."""
-        mailer = MailerService(test_settings)
-
         assert mailer._is_domain_allowed("user@anydomain.com") is True
         assert mailer._is_domain_allowed("user@example.org") is True
 
-    def test_is_domain_allowed_case_insensitive(self, test_settings_with_allowlist):
+    def test_is_domain_allowed_case_insensitive(self, mailer_allowlist):
         """Test domain checking is case-insensitive."""
-        mailer = MailerService(test_settings_with_allowlist)
-
-        assert mailer._is_domain_allowed("user@EXAMPLE.COM") is True
-        assert mailer._is_domain_allowed("user@Example.Com") is True
-        assert mailer._is_domain_allowed("USER@example.com") is True
+        assert mailer_allowlist._is_domain_allowed("user@EXAMPLE.COM") is True
+        assert mailer_allowlist._is_domain_allowed("user@Example.Com") is True
+        assert mailer_allowlist._is_domain_allowed("USER@example.com") is True
 
-    def test_extract_message_id_from_dict(self, test_settings):
-        """Test extracting message ID from SMTP response dict."""
-        mailer = MailerService(test_settings)
+    def test_allowed_domains_precomputed(self, mailer, mailer_allowlist):
+        """Test the allowlist is lower-cased into a frozenset once, and absent without an allowlist."""
+        assert mailer_allowlist._allowed_domains == frozenset({"example.com", "test.com"})
+        assert isinstance(mailer_allowlist._allowed_domains, frozenset)
+        assert mailer._allowed_domains is None
 
-        # Simulate SMTP response with Message-ID
-        smtp_result = {"user@example.com": (250, "Message-ID: <abc123@mail.example.com>")}
+    def test_extract_message_id_from_data_response(self, mailer):
+        """Test extracting message ID from the DATA response of an aiosmtplib send result."""
+        smtp_result = ({}, "2.0.0 Ok: queued as 4F1X2 Message-ID: <abc123@mail.example.com>")
 
         message_id = mailer._extract_message_id(smtp_result)
         assert message_id == "abc123@mail.example.com"
 
-    def test_extract_message_id_no_id(self, test_settings):
-        """Test extracting message ID when not present."""
-        mailer = MailerService(test_settings)
+    def test_message_id_regex_precompiled(self):
+        """Test the Message-ID pattern is compiled once at import, not per SMTP response."""
+        assert isinstance(_MESSAGE_ID_RE, re.Pattern)
+        assert _MESSAGE_ID_RE.search("250 OK Message-ID: <x@y>").group(1) == "x@y"
 
-        smtp_result = {"user@example.com": (250, "OK")}
+    def test_extract_message_id_no_id(self, mailer):
+        """Test extracting message ID when the server does not report one."""
+        smtp_result = ({}, "2.0.0 Ok: queued as 4F1X2")
 
         message_id = mailer._extract_message_id(smtp_result)
         assert message_id is None
 
-    def test_extract_message_id_invalid_format(self, test_settings):
+    def test_extract_message_id_invalid_format(self, mailer):
         """Test extracting message ID with invalid format."""
-        mailer = MailerService(test_settings)
-
         smtp_result = "invalid format"
 
         message_id = mailer._extract_message_id(smtp_result)
         assert message_id is None
 
-    def test_extract_message_id_exception_handling(self, test_settings):
-        """Test exception handling in message ID extraction."""
-        mailer = MailerService(test_settings)
-
-        # Pass something that will cause an exception
-        smtp_result = None
-
-        message_id = mailer._extract_message_id(smtp_result)
+    def test_extract_message_id_none(self, mailer):
+        """Test a missing SMTP result yields no message ID."""
+        message_id = mailer._extract_message_id(None)
         assert message_id is None
 
-
+    @pytest.mark.parametrize(
+        "smtp_result",
+        [
+            None,
+            "invalid format",
+            (),
+            ({}, None),
+            ({}, "2.0.0 Ok"),
+            ({}, "2.0.0 Ok Message-ID: <abc123@mail.example.com>"),
+        ],
+        ids=["none", "str", "empty_tuple", "no_response", "no_id", "with_id"],
+    )
+    def test_extract_message_id_raises_nothing_internally(self, mailer, smtp_result):
+        """Test malformed SMTP results are rejected by checks, not by raising and catching."""
+        raised = []
+
+        def tracer(frame, event, arg):
+            if event == "exception":
+                raised.append(arg[0])
+            return tracer
+
+        # Restore the previous tracer afterwards so coverage keeps recording
+        previous = sys.gettrace()
+        sys.settrace(tracer)
+        try:
+            mailer._extract_message_id(smtp_result)
+        finally:
+            sys.settrace(previous)
+
+        assert raised == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
 class TestMailerMessageConstruction:
     """Tests for email message construction."""
 
-    async def test_message_has_required_headers(self, test_settings, mock_smtp):
+    async def test_message_has_required_headers(self, test_settings, mock_smtp, mailer):
         """Test that constructed message has required headers."""
-        mailer = MailerService(test_settings)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp) as mock:
-            await mailer.send_email(to=["test@example.com"], subject="Required Headers", text="Test")
-
-            # Get the message object passed to send()
-            msg = mock.call_args.args[0]
-            assert msg["Subject"] == "Required Headers"
-            assert msg["From"] == test_settings.from_email
-            assert msg["To"] == "test@example.com"
+        await mailer.send_email(to=["test@example.com"], subject="Required Headers", text="Test")
 
-    async def test_message_multipart_structure(self, test_settings, mock_smtp):
-        """Test multipart message structure with HTML and text."""
-        mailer = MailerService(test_settings)
+        # Get the message object passed to send()
+        msg = mock_smtp.call_args.args[0]
+        assert msg["Subject"] == "Required Headers"
+        assert msg["From"] == test_settings.from_email
+        assert msg["To"] == "test@example.com"
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp) as mock:
-            await mailer.send_email(to=["test@example.com"], subject="Multipart", html="<p>HTML</p>", text="Text")
-
-            msg = mock.call_args.args[0]
-            assert msg.is_multipart()
-
-    async def test_message_single_part_text(self, test_settings, mock_smtp):
-        """Test single-part text message structure."""
-        mailer = MailerService(test_settings)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp) as mock:
-            await mailer.send_email(to=["test@example.com"], subject="Single Part", text="Plain text only")
-
-            msg = mock.call_args.args[0]
-            assert not msg.is_multipart()
-
-    async def test_message_single_part_html(self, test_settings, mock_smtp):
-        """Test single-part HTML message structure."""
-        mailer = MailerService(test_settings)
-
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp) as mock:
-            await mailer.send_email(to=["test@example.com"], subject="Single Part HTML", html="<h1>HTML only</h1>")
+    async def test_message_multiple_recipients_header(self, mailer, mock_smtp):
+        """Test To header with multiple recipients."""
+        recipients = ["user1@example.com", "user2@example.com"]
 
-            msg = mock.call_args.args[0]
-            assert not msg.is_multipart()
+        await mailer.send_email(to=recipients, subject="Multiple Recipients", text="Test")
+
+        msg = mock_smtp.call_args.args[0]
+        assert msg["To"] == "user1@example.com, user2@example.com"
+
+
+@pytest.fixture
+def smtp_client(monkeypatch) -> SimpleNamespace:
+    """Stub out aiosmtplib.SMTP's network calls; every instance shares these mocks."""
+    client = SimpleNamespace(
+        connect=AsyncMock(),
+        send_message=AsyncMock(return_value=({}, "OK")),
+        quit=AsyncMock(),
+    )
+    for name, mock in vars(client).items():
+        monkeypatch.setattr(aiosmtplib.SMTP, name, mock)
+    monkeypatch.setattr(aiosmtplib.SMTP, "is_connected", property(lambda self: True))
+    return client
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestMailerConnectionPool:
+    """Tests for SMTP connection reuse through SMTPConnectionPool."""
+
+    async def test_send_email_reuses_connection(self, test_settings, smtp_client):
+        """Test sequential sends share one SMTP connection."""
+        async with SMTPConnectionPool(test_settings) as pool:
+            mailer = MailerService(test_settings, pool=pool)
+            for _ in range(10):
+                assert await mailer.send_email(to=["test@example.com"], subject="Pooled", text="Test") is not None
+
+        smtp_client.connect.assert_called_once()
+        assert smtp_client.send_message.call_count == 10
+        smtp_client.quit.assert_called_once()  # closed with the pool
+
+    async def test_send_email_returns_server_message_id(self, test_settings, smtp_client):
+        """Test the Message-ID from a pooled connection's DATA response is returned."""
+        smtp_client.send_message.return_value = ({}, "2.0.0 Ok Message-ID: <srv-2@mail.example.com>")
+        async with SMTPConnectionPool(test_settings) as pool:
+            mailer = MailerService(test_settings, pool=pool)
+            message_id = await mailer.send_email(to=["test@example.com"], subject="Pooled", text="Test")
+
+        assert message_id == "srv-2@mail.example.com"
+
+    async def test_send_email_respects_pool_max_messages(self, test_settings, smtp_client):
+        """Test a connection is recycled after smtp_pool_max_messages sends."""
+        max_messages = test_settings.smtp_pool_max_messages
+        async with SMTPConnectionPool(test_settings) as pool:
+            mailer = MailerService(test_settings, pool=pool)
+            for _ in range(max_messages + 1):
+                await mailer.send_email(to=["test@example.com"], subject="Pooled", text="Test")
+
+        assert smtp_client.connect.call_count == 2
+        assert smtp_client.quit.call_count == 2  # one retired at the cap, one closed with the pool
+
+    async def test_send_email_reconnects_after_server_disconnect(self, test_settings, smtp_client):
+        """Test an idle connection dropped by the server is replaced and the send retried."""
+        async with SMTPConnectionPool(test_settings) as pool:
+            mailer = MailerService(test_settings, pool=pool)
+            await mailer.send_email(to=["test@example.com"], subject="First", text="Test")
+
+            smtp_client.send_message.side_effect = [aiosmtplib.SMTPServerDisconnected("gone"), ({}, "OK")]
+            message_id = await mailer.send_email(to=["test@example.com"], subject="Second", text="Test")
 
-    async def test_message_multiple_recipients_header(self, test_settings, mock_smtp):
-        """Test To header with multiple recipients."""
-        mailer = MailerService(test_settings)
+        assert message_id is not None
+        assert smtp_client.connect.call_count == 2
+        assert smtp_client.send_message.call_count == 3
 
-        recipients = ["user1@example.com", "user2@example.com"]
+    async def test_send_email_multiple_recipients_one_transaction(self, test_settings, smtp_client):
+        """Test all recipients go out in a single send_message call, not one SMTP transaction each."""
+        recipients = ["user1@example.com", "user2@example.com", "user3@example.com"]
 
-        with patch("app.services.mailer.aiosmtplib.send", new=mock_smtp) as mock:
-            await mailer.send_email(to=recipients, subject="Multiple Recipients", text="Test")
+        async with SMTPConnectionPool(test_settings) as pool:
+            mailer = MailerService(test_settings, pool=pool)
+            await mailer.send_email(to=recipients, subject="Multi-recipient", text="Test")
+
+        smtp_client.send_message.assert_called_once()
+        msg = smtp_client.send_message.call_args.args[0]
+        assert msg["To"] == ", ".join(recipients)
+
+    async def test_pool_limits_open_connections(self, test_settings, smtp_client):
+        """Test concurrent sends never open more than smtp_pool_size connections."""
+        pool_size = test_settings.smtp_pool_size
+
+        async def slow_send(msg):
+            await asyncio.sleep(0.01)
+            return {}, "OK"
+
+        smtp_client.send_message.side_effect = slow_send
+        async with SMTPConnectionPool(test_settings) as pool:
+            mailer = MailerService(test_settings, pool=pool)
+            await asyncio.gather(
+                *[
+                    mailer.send_email(to=["test@example.com"], subject="Burst", text="Test")
+                    for _ in range(pool_size * 3)
+                ]
+            )
 
-            msg = mock.call_args.args[0]
-            assert msg["To"] == "user1@example.com, user2@example.com"
+        assert smtp_client.connect.call_count == pool_size
@@ -1,19 +1,29 @@
 """Unit tests for RateLimitService (in-memory rate limiting)."""
 
-from datetime import datetime, timedelta
+import os
+import statistics
+import time
 from unittest.mock import patch
 
 import pytest
 
-from app.services.rate_limit import RateLimitService
+from app.services.rate_limit import RateLimitService, _day_number
+
+# Every test here is a coroutine; run them all on the session loop configured in pytest.ini
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+@pytest.fixture
+def rate_limit(test_settings) -> RateLimitService:
+    """Fresh RateLimitService per test: tests record emails and inspect the per-key counters."""
+    return RateLimitService(test_settings)
 
 
 class TestRateLimitService:
     """Tests for in-memory rate limiting."""
 
-    async def test_check_daily_limit_within_limit(self, test_settings):
+    async def test_check_daily_limit_within_limit(self, rate_limit):
         """Test check passes when within daily limit."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_1"
 
         # Should be within limit (default is 100)
@@ -21,9 +31,8 @@ class TestRateLimitService:
 
         assert result is True
 
-    async def test_check_daily_limit_at_limit(self, test_settings):
+    async def test_check_daily_limit_at_limit(self, rate_limit):
         """Test check fails when at limit."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_2"
 
         # Record 100 emails (the limit)
@@ -34,9 +43,8 @@ class TestRateLimitService:
 
         assert result is False
 
-    async def test_check_daily_limit_exceed_limit(self, test_settings):
+    async def test_check_daily_limit_exceed_limit(self, rate_limit):
         """Test check fails when exceeding limit."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_3"
 
         # Record 50 emails
@@ -47,9 +55,8 @@ class TestRateLimitService:
 
         assert result is False
 
-    async def test_check_daily_limit_just_under_limit(self, test_settings):
+    async def test_check_daily_limit_just_under_limit(self, rate_limit):
         """Test check passes when just under limit."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_4"
 
         # Record 99 emails
@@ -60,38 +67,42 @@ class TestRateLimitService:
 
         assert result is True
 
-    async def test_record_emails_single(self, test_settings):
+    async def test_record_emails_single(self, rate_limit):
         """Test recording single email."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_5"
 
         await rate_limit.record_emails(api_key, email_count=1)
 
-        assert len(rate_limit.requests[api_key]) == 1
+        assert rate_limit.current_usage(api_key) == 1
 
-    async def test_record_emails_multiple(self, test_settings):
+    async def test_record_emails_multiple(self, rate_limit):
         """Test recording multiple emails."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_6"
 
         await rate_limit.record_emails(api_key, email_count=5)
 
-        assert len(rate_limit.requests[api_key]) == 5
+        assert rate_limit.current_usage(api_key) == 5
 
-    async def test_record_emails_incremental(self, test_settings):
+    async def test_record_emails_single_bucket(self, rate_limit):
+        """Test a batch of emails is one counter update, not one entry per email."""
+        api_key = "sk_test_key_bulk"
+
+        await rate_limit.record_emails(api_key, email_count=100)
+
+        assert rate_limit.counts[api_key] == {_day_number(time.time()): 100}
+
+    async def test_record_emails_incremental(self, rate_limit):
         """Test recording emails incrementally."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_7"
 
         await rate_limit.record_emails(api_key, email_count=3)
         await rate_limit.record_emails(api_key, email_count=2)
         await rate_limit.record_emails(api_key, email_count=5)
 
-        assert len(rate_limit.requests[api_key]) == 10
+        assert rate_limit.current_usage(api_key) == 10
 
-    async def test_multiple_api_keys_independent(self, test_settings):
+    async def test_multiple_api_keys_independent(self, rate_limit):
         """Test that different API keys have independent limits."""
-        rate_limit = RateLimitService(test_settings)
         key1 = "sk_test_key_8"
         key2 = "sk_test_key_9"
 
@@ -102,8 +113,8 @@ class TestRateLimitService:
         await rate_limit.record_emails(key2, email_count=30)
 
         # Check limits are independent
-        assert len(rate_limit.requests[key1]) == 50
-        assert len(rate_limit.requests[key2]) == 30
+        assert rate_limit.current_usage(key1) == 50
+        assert rate_limit.current_usage(key2) == 30
 
         # key1 can still send 50 more
         result1 = await rate_limit.check_daily_limit(key1, email_count=50)
@@ -113,88 +124,78 @@ class TestRateLimitService:
         result2 = await rate_limit.check_daily_limit(key2, email_count=70)
         assert result2 is True
 
-    async def test_cleanup_old_requests(self, test_settings):
-        """Test cleanup of old requests outside rate window."""
-        rate_limit = RateLimitService(test_settings)
+    async def test_cleanup_old_requests(self, rate_limit):
+        """Test cleanup of day buckets outside rate window."""
         api_key = "sk_test_key_10"
 
-        now = datetime.utcnow()
+        now = time.time()
 
-        # Add old request (2 days ago, outside 1-day window)
-        old_time = now - timedelta(days=2)
-        rate_limit.requests[api_key].append(old_time)
+        # Add old bucket (2 days ago, outside 1-day window)
+        old_day = _day_number(now) - 2
+        rate_limit.counts[api_key][old_day] = 1
 
-        # Add recent request
-        rate_limit.requests[api_key].append(now)
+        # Add today's bucket
+        rate_limit.counts[api_key][_day_number(now)] = 1
 
         # Trigger cleanup
         await rate_limit._cleanup_old_requests(api_key, now)
 
-        # Should only have the recent request
-        assert len(rate_limit.requests[api_key]) == 1
-        assert rate_limit.requests[api_key][0] == now
+        # Should only have today's bucket
+        assert rate_limit.counts[api_key] == {_day_number(now): 1}
 
-    async def test_check_daily_limit_triggers_cleanup(self, test_settings):
-        """Test that check_daily_limit automatically cleans up old requests."""
-        rate_limit = RateLimitService(test_settings)
+    async def test_check_daily_limit_triggers_cleanup(self, rate_limit):
+        """Test that check_daily_limit automatically cleans up old buckets."""
         api_key = "sk_test_key_11"
 
-        now = datetime.utcnow()
+        now = time.time()
 
         # Add 100 old requests (2 days ago)
-        old_time = now - timedelta(days=2)
-        for _ in range(100):
-            rate_limit.requests[api_key].append(old_time)
+        rate_limit.counts[api_key][_day_number(now) - 2] = 100
 
         # Should pass because old requests are cleaned up
         result = await rate_limit.check_daily_limit(api_key, email_count=10)
 
         assert result is True
-        # Old requests should be cleaned
-        assert len(rate_limit.requests[api_key]) == 0
+        # Old bucket should be dropped
+        assert rate_limit.counts[api_key] == {}
 
-    async def test_rate_window_days_setting(self, test_settings):
+    async def test_rate_window_days_setting(self, test_settings, rate_limit):
         """Test that rate window respects settings."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_12"
 
-        now = datetime.utcnow()
+        now = time.time()
 
-        # Add request exactly at window edge (1 day ago)
-        window_edge = now - timedelta(days=test_settings.rate_window_days)
-        rate_limit.requests[api_key].append(window_edge)
+        # Bucket exactly at window edge (rate_window_days ago)
+        window_edge = _day_number(now) - test_settings.rate_window_days
+        rate_limit.counts[api_key][window_edge] = 1
 
-        # Add request just inside window
-        inside_window = now - timedelta(hours=23)
-        rate_limit.requests[api_key].append(inside_window)
+        # Bucket inside window (today)
+        rate_limit.counts[api_key][_day_number(now)] = 1
 
         await rate_limit._cleanup_old_requests(api_key, now)
 
-        # Request at window edge should be removed, inside should remain
-        assert len(rate_limit.requests[api_key]) == 1
+        # Bucket at window edge should be removed, inside should remain
+        assert list(rate_limit.counts[api_key]) == [_day_number(now)]
 
-    async def test_empty_requests_for_new_key(self, test_settings):
+    async def test_empty_requests_for_new_key(self, rate_limit):
         """Test that new API key has empty request list."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_new"
 
         result = await rate_limit.check_daily_limit(api_key, email_count=1)
 
         assert result is True
-        assert len(rate_limit.requests[api_key]) == 0
+        assert rate_limit.current_usage(api_key) == 0
 
-    async def test_record_zero_emails(self, test_settings):
+    async def test_record_zero_emails(self, rate_limit):
         """Test recording zero emails."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_13"
 
         await rate_limit.record_emails(api_key, email_count=0)
 
-        assert len(rate_limit.requests[api_key]) == 0
+        assert rate_limit.current_usage(api_key) == 0
 
-    async def test_check_daily_limit_zero_count(self, test_settings):
+    async def test_check_daily_limit_zero_count(self, rate_limit):
         """Test checking limit with zero email count."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_14"
 
         result = await rate_limit.check_daily_limit(api_key, email_count=0)
@@ -202,52 +203,47 @@ class TestRateLimitService:
         assert result is True
 
 
-class TestRateLimitTimestamps:
-    """Tests for timestamp handling in rate limiting."""
+class TestRateLimitDayBuckets:
+    """Tests for per-day usage buckets in rate limiting."""
 
-    async def test_timestamps_are_datetime(self, test_settings):
-        """Test that all stored timestamps are datetime objects."""
-        rate_limit = RateLimitService(test_settings)
+    async def test_buckets_keyed_by_utc_day(self, rate_limit):
+        """Test that emails are counted under the current UTC date."""
         api_key = "sk_test_key_15"
 
+        before = _day_number(time.time())
         await rate_limit.record_emails(api_key, email_count=5)
+        after = _day_number(time.time())
 
-        for timestamp in rate_limit.requests[api_key]:
-            assert isinstance(timestamp, datetime)
+        ((day, count),) = rate_limit.counts[api_key].items()
+        assert before <= day <= after
+        assert count == 5
 
-    async def test_timestamps_recent(self, test_settings):
-        """Test that recorded timestamps are recent."""
-        rate_limit = RateLimitService(test_settings)
+    async def test_same_day_records_accumulate(self, rate_limit):
+        """Test that repeated records on one day share a single bucket."""
         api_key = "sk_test_key_16"
 
-        before = datetime.utcnow()
         await rate_limit.record_emails(api_key, email_count=1)
-        after = datetime.utcnow()
+        await rate_limit.record_emails(api_key, email_count=2)
 
-        timestamp = rate_limit.requests[api_key][0]
-        assert before <= timestamp <= after
+        assert len(rate_limit.counts[api_key]) == 1
+        assert rate_limit.current_usage(api_key) == 3
 
-    async def test_multiple_timestamps_ordered(self, test_settings):
-        """Test that multiple timestamps maintain order."""
-        rate_limit = RateLimitService(test_settings)
+    async def test_current_usage_ignores_expired_buckets(self, rate_limit):
+        """Test that current_usage only counts buckets inside the window."""
         api_key = "sk_test_key_17"
+        now = time.time()
 
-        await rate_limit.record_emails(api_key, email_count=3)
+        rate_limit.counts[api_key][_day_number(now) - 2] = 40
+        rate_limit.counts[api_key][_day_number(now)] = 3
 
-        timestamps = rate_limit.requests[api_key]
-        # All timestamps should be very close (same utcnow() call)
-        assert len(timestamps) == 3
-        # They should all be equal or very close
-        time_diff = (timestamps[-1] - timestamps[0]).total_seconds()
-        assert time_diff < 1  # Less than 1 second apart
+        assert rate_limit.current_usage(api_key, now) == 3
 
 
 class TestRateLimitEdgeCases:
     """Tests for edge cases in rate limiting."""
 
-    async def test_large_email_count(self, test_settings):
+    async def test_large_email_count(self, rate_limit):
         """Test handling large email count."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_18"
 
         # Try to send 1000 emails at once (exceeds limit)
@@ -255,9 +251,8 @@ class TestRateLimitEdgeCases:
 
         assert result is False
 
-    async def test_exactly_at_limit(self, test_settings):
+    async def test_exactly_at_limit(self, test_settings, rate_limit):
         """Test behavior when exactly at limit."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_19"
         limit = test_settings.default_daily_limit
 
@@ -272,10 +267,8 @@ class TestRateLimitEdgeCases:
         result_zero = await rate_limit.check_daily_limit(api_key, email_count=0)
         assert result_zero is True
 
-    async def test_concurrent_api_keys(self, test_settings):
+    async def test_concurrent_api_keys(self, rate_limit):
         """Test handling multiple API keys concurrently."""
-        rate_limit = RateLimitService(test_settings)
-
         # Simulate multiple keys being used
         keys = [f"sk_test_key_{i}" for i in range(10)]
 
@@ -284,32 +277,52 @@ class TestRateLimitEdgeCases:
 
         # All keys should have independent counts
         for key in keys:
-            assert len(rate_limit.requests[key]) == 10
+            assert rate_limit.current_usage(key) == 10
             result = await rate_limit.check_daily_limit(key, email_count=90)
             assert result is True
 
-    async def test_cleanup_with_empty_requests(self, test_settings):
+    async def test_cleanup_with_empty_requests(self, rate_limit):
         """Test cleanup when there are no requests."""
-        rate_limit = RateLimitService(test_settings)
         api_key = "sk_test_key_20"
 
-        now = datetime.utcnow()
+        now = time.time()
 
         # Should not raise error
         await rate_limit._cleanup_old_requests(api_key, now)
 
-        assert len(rate_limit.requests[api_key]) == 0
-
-    async def test_requests_dict_structure(self, test_settings):
-        """Test that requests dictionary has correct structure."""
-        rate_limit = RateLimitService(test_settings)
+        assert rate_limit.current_usage(api_key) == 0
 
-        assert isinstance(rate_limit.requests, dict)
+    async def test_counts_dict_structure(self, rate_limit):
+        """Test that the counters dictionary has correct structure."""
+        assert isinstance(rate_limit.counts, dict)
 
         # Add some data
         await rate_limit.record_emails("key1", 5)
 
         # Check structure
-        assert "key1" in rate_limit.requests
-        assert isinstance(rate_limit.requests["key1"], list)
-        assert all(isinstance(ts, datetime) for ts in rate_limit.requests["key1"])
+        assert "key1" in rate_limit.counts
+        assert isinstance(rate_limit.counts["key1"], dict)
+        assert all(isinstance(day, int) and isinstance(count, int) for day, count in rate_limit.counts["key1"].items())
+
+
+@pytest.mark.perf
+@pytest.mark.skipif(os.getenv("CI") == "true", reason="timing assertions are too noisy on shared CI runners")
+class TestRateLimitPerformance:
+    """Performance regression guards for the day-bucket counters."""
+
+    async def test_record_emails_is_constant_time(self, rate_limit):
+        """Test recording 10,000 emails costs about the same as recording 10."""
+
+        async def median_ns(api_key: str, email_count: int, runs: int = 20) -> float:
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter_ns()
+                await rate_limit.record_emails(api_key, email_count)
+                timings.append(time.perf_counter_ns() - start)
+            return statistics.median(timings)
+
+        small = await median_ns("sk_perf_small", 10)
+        large = await median_ns("sk_perf_large", 10_000)
+
+        # A per-email loop would make the large call ~1000x slower
+        assert large < 2 * small
@@ -2,110 +2,162 @@
 
 import uuid
 from datetime import date, timedelta
+from typing import Any
+from unittest.mock import AsyncMock
 
 import pytest
+from freezegun import freeze_time
+from sqlalchemy import Select
+from sqlalchemy.sql.elements import BooleanClauseList
 
 from app.models.api_key import APIKey
 from app.models.daily_usage import DailyUsage
 from app.models.send_log import SendLog
 from app.services.usage_tracking import UsageTrackingService
 
+# Every test here is a coroutine; run them all on the session loop configured in pytest.ini
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+# Fixed "today" for every test in this module, so usage rows never straddle midnight
+TODAY = date(2024, 1, 15)
+
+
+class _FakeResult:
+    def __init__(self, value: Any):
+        self._value = value
+
+    def scalar_one_or_none(self) -> Any:
+        return self._value
+
+
+class FakeDbSession:
+    """In-memory stand-in for AsyncSession, covering the calls UsageTrackingService makes for lookups.
+
+    Only single-column SELECTs filtered by ``column == value`` conditions are supported, which is
+    what get_daily_limit and get_usage_for_day issue. Anything else should use the real db_session.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[Any, list[Any]] = {}
+
+    def add(self, obj: Any) -> None:
+        if isinstance(obj, APIKey) and obj.id is None:
+            obj.id = uuid.uuid4()
+        self.rows.setdefault(obj.__table__, []).append(obj)
+
+    def add_all(self, objs: list[Any]) -> None:
+        for obj in objs:
+            self.add(obj)
+
+    async def commit(self) -> None:
+        pass
+
+    async def execute(self, stmt: Select) -> _FakeResult:
+        column = stmt.selected_columns[0]
+        where = stmt.whereclause
+        criteria = where.clauses if isinstance(where, BooleanClauseList) else [where]
+        for row in self.rows.get(column.table, []):
+            if all(getattr(row, c.left.key) == c.right.value for c in criteria):
+                return _FakeResult(getattr(row, column.key))
+        return _FakeResult(None)
+
+
+@pytest.fixture
+def fake_db_session() -> FakeDbSession:
+    """Empty in-memory session for UsageTrackingService tests that do not need real SQL."""
+    return FakeDbSession()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _frozen_today():
+    """Freeze the clock at TODAY; real_asyncio keeps the event loop on real monotonic time."""
+    with freeze_time(TODAY, real_asyncio=True):
+        yield
+
 
 class TestUsageTrackingService:
-    """Tests for usage tracking service."""
+    """Tests for usage tracking service logic, backed by FakeDbSession."""
 
-    async def test_get_daily_limit_custom(self, db_session, test_settings):
+    async def test_get_daily_limit_custom(self, fake_db_session, test_settings):
         """Test getting custom daily limit from API key."""
-        service = UsageTrackingService(db_session, test_settings)
+        service = UsageTrackingService(fake_db_session, test_settings)
 
         # Create API key with custom limit
         api_key = APIKey(key_hash="test_usage_1", name="Custom Limit Key", daily_limit=250)
-        db_session.add(api_key)
-        await db_session.commit()
+        fake_db_session.add(api_key)
+        await fake_db_session.commit()
 
         limit = await service.get_daily_limit(api_key.id)
 
         assert limit == 250
 
-    async def test_get_daily_limit_default(self, db_session, test_settings):
+    async def test_get_daily_limit_default(self, fake_db_session, test_settings):
         """Test getting default daily limit."""
-        service = UsageTrackingService(db_session, test_settings)
+        service = UsageTrackingService(fake_db_session, test_settings)
 
         # Create API key without custom limit
         api_key = APIKey(key_hash="test_usage_2", name="Default Limit Key", daily_limit=None)
-        db_session.add(api_key)
-        await db_session.commit()
+        fake_db_session.add(api_key)
+        await fake_db_session.commit()
 
         limit = await service.get_daily_limit(api_key.id)
 
         assert limit == test_settings.default_daily_limit
 
-    async def test_get_usage_for_day(self, db_session, test_settings):
+    async def test_get_usage_for_day(self, fake_db_session, test_settings):
         """Test getting usage for specific day."""
-        service = UsageTrackingService(db_session, test_settings)
+        service = UsageTrackingService(fake_db_session, test_settings)
 
-        # Create API key
-        api_key = APIKey(key_hash="test_usage_3", name="Usage Day Key")
-        db_session.add(api_key)
-        await db_session.commit()
-
-        # Create usage for today
-        today = date.today()
-        usage = DailyUsage(api_key_id=api_key.id, day=today, count=42)
-        db_session.add(usage)
-        await db_session.commit()
+        # Create API key with usage for today
+        api_key = APIKey(id=uuid.uuid4(), key_hash="test_usage_3", name="Usage Day Key")
+        usage = DailyUsage(api_key_id=api_key.id, day=TODAY, count=42)
+        fake_db_session.add_all([api_key, usage])
+        await fake_db_session.commit()
 
-        count = await service.get_usage_for_day(api_key.id, today)
+        count = await service.get_usage_for_day(api_key.id, TODAY)
 
         assert count == 42
 
-    async def test_get_usage_for_day_no_data(self, db_session, test_settings):
+    async def test_get_usage_for_day_no_data(self, fake_db_session, test_settings):
         """Test getting usage when no data exists."""
-        service = UsageTrackingService(db_session, test_settings)
+        service = UsageTrackingService(fake_db_session, test_settings)
 
         # Create API key
         api_key = APIKey(key_hash="test_usage_4", name="No Usage Key")
-        db_session.add(api_key)
-        await db_session.commit()
+        fake_db_session.add(api_key)
+        await fake_db_session.commit()
 
-        today = date.today()
-        count = await service.get_usage_for_day(api_key.id, today)
+        count = await service.get_usage_for_day(api_key.id, TODAY)
 
         assert count == 0
 
-    async def test_check_daily_limit_within(self, db_session, test_settings):
-        """Test check passes when within limit."""
-        service = UsageTrackingService(db_session, test_settings)
+    async def test_nonexistent_api_key(self, fake_db_session, test_settings):
+        """Test handling non-existent API key gracefully."""
+        service = UsageTrackingService(fake_db_session, test_settings)
 
-        # Create API key
-        api_key = APIKey(key_hash="test_usage_5", name="Within Limit Key")
-        db_session.add(api_key)
-        await db_session.commit()
+        fake_uuid = uuid.uuid4()
 
-        # Create usage at 50
-        today = date.today()
-        usage = DailyUsage(api_key_id=api_key.id, day=today, count=50)
-        db_session.add(usage)
-        await db_session.commit()
+        # Should return default limit
+        limit = await service.get_daily_limit(fake_uuid)
+        assert limit == test_settings.default_daily_limit
 
-        # Check if can send 10 more (50 + 10 = 60 < 100)
-        allowed = await service.check_daily_limit(api_key.id, email_count=10)
+        # Should return 0 usage
+        usage = await service.get_usage_for_day(fake_uuid, TODAY)
+        assert usage == 0
 
-        assert allowed is True
+
+@pytest.mark.database
+class TestUsageTrackingServiceDatabase:
+    """Tests that run UsageTrackingService queries against the real database."""
 
     async def test_check_daily_limit_exceeds(self, db_session, test_settings):
         """Test check fails when would exceed limit."""
         service = UsageTrackingService(db_session, test_settings)
 
-        # Create API key
-        api_key = APIKey(key_hash="test_usage_6", name="Exceed Limit Key")
-        db_session.add(api_key)
-        await db_session.commit()
-
-        # Create usage at 95
-        today = date.today()
-        usage = DailyUsage(api_key_id=api_key.id, day=today, count=95)
-        db_session.add(usage)
+        # Create API key with usage at 95; the client-side id lets both rows go in one commit
+        api_key = APIKey(id=uuid.uuid4(), key_hash="test_usage_6", name="Exceed Limit Key")
+        usage = DailyUsage(api_key_id=api_key.id, day=TODAY, count=95)
+        db_session.add_all([api_key, usage])
         await db_session.commit()
 
         # Check if can send 10 more (95 + 10 = 105 > 100)
@@ -113,16 +165,35 @@ class TestUsageTrackingService:
 
         assert allowed is False
 
-    async def test_nonexistent_api_key(self, db_session, test_settings):
-        """Test handling non-existent API key gracefully."""
+    async def test_check_daily_limit_within(self, db_session, test_settings):
+        """Test check passes when within limit."""
         service = UsageTrackingService(db_session, test_settings)
 
-        fake_uuid = uuid.uuid4()
+        # Create API key with usage at 50
+        api_key = APIKey(id=uuid.uuid4(), key_hash="test_usage_5", name="Within Limit Key")
+        usage = DailyUsage(api_key_id=api_key.id, day=TODAY, count=50)
+        db_session.add_all([api_key, usage])
+        await db_session.commit()
 
-        # Should return default limit
-        limit = await service.get_daily_limit(fake_uuid)
-        assert limit == test_settings.default_daily_limit
+        # Check if can send 10 more (50 + 10 = 60 < 100)
+        allowed = await service.check_daily_limit(api_key.id, email_count=10)
 
-        # Should return 0 usage
-        usage = await service.get_usage_for_day(fake_uuid, date.today())
-        assert usage == 0
+        assert allowed is True
+
+    async def test_check_daily_limit_single_query(self, db_session, test_settings, monkeypatch):
+        """Test the limit check reads the limit and today's usage in one round-trip."""
+        service = UsageTrackingService(db_session, test_settings)
+
+        api_key = APIKey(id=uuid.uuid4(), key_hash="test_usage_7", name="Single Query Key", daily_limit=20)
+        usage = DailyUsage(api_key_id=api_key.id, day=TODAY, count=15)
+        db_session.add_all([api_key, usage])
+        await db_session.commit()
+
+        execute = AsyncMock(wraps=db_session.execute)
+        monkeypatch.setattr(db_session, "execute", execute)
+
+        # 15 + 10 = 25 > 20: both values must come from that single query
+        allowed = await service.check_daily_limit(api_key.id, email_count=10)
+
+        assert allowed is False
+        execute.assert_awaited_once()